@@ -1,3 +1,20 @@
+import csv
+import glob
+import hashlib
+import itertools
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+
+
 # Helper functions
 def exists(fn, iterable):
     return any(map(fn, iterable))
@@ -160,28 +177,8 @@ def ordenar_posicoes(posicoes: tuple) -> tuple:
     Returns:
         tuple: tuplo com as posições ordenadas
     """
-    lista_posicoes = list(posicoes)
-    len_lista_posicoes = len(lista_posicoes)
-
-    # bubble sort: https://realpython.com/sorting-algorithms-python/#the-bubble-sort-algorithm-in-python
-    for i in range(len_lista_posicoes):
-        ordenado = True
-
-        for j in range(len_lista_posicoes - i - 1):
-            posicao1_x = obter_pos_x(lista_posicoes[j])
-            posicao1_y = obter_pos_y(lista_posicoes[j])
-
-            posicao2_x = obter_pos_x(lista_posicoes[j + 1])
-            posicao2_y = obter_pos_y(lista_posicoes[j + 1])
-
-            if posicao1_y > posicao2_y or (posicao1_y == posicao2_y and posicao2_x < posicao1_x):
-                lista_posicoes[j], lista_posicoes[j + 1] = lista_posicoes[j + 1], lista_posicoes[j]
-                ordenado = False
-
-        if ordenado:
-            break
-
-    return tuple(lista_posicoes)
+    # ordem de leitura: primeiro pela linha (y), depois pela coluna (x)
+    return tuple(sorted(posicoes, key=lambda posicao: (obter_pos_y(posicao), obter_pos_x(posicao))))
 
 
 def cria_animal(s: str, r: int, a: int) -> dict:
@@ -214,8 +211,125 @@ de reprodução r (maior do que 0) e à frequência de alimentação a (maior ou
     }
 
 
+class Especie:
+    """Parâmetros partilhados por todos os animais de uma espécie (guardados uma única vez na tabela ESPECIES)."""
+    __slots__ = ('nome', 'reproducao', 'alimentacao', 'predador')
+
+    def __init__(self, nome: str, reproducao: int, alimentacao: int):
+        self.nome = nome
+        self.reproducao = reproducao
+        self.alimentacao = alimentacao
+        self.predador = alimentacao != 0
+
+
+# tabela de espécies: id -> Especie, e (especie, reproducao, alimentacao) -> id
+ESPECIES = []
+IDS_ESPECIES = {}
+
+
+def obter_id_especie(s: str, r: int, a: int) -> int:
+    """Devolve o id da espécie com os parâmetros dados, acrescentando-a à tabela de espécies se ainda não existir.
+
+    Args:
+        s (str): especie
+        r (int): freq de reprodução
+        a (int): freq de alimentação
+
+    Returns:
+        int: id da espécie
+    """
+    chave = (s, r, a)
+
+    if chave not in IDS_ESPECIES:
+        IDS_ESPECIES[chave] = len(ESPECIES)
+        ESPECIES.append(Especie(s, r, a))
+
+    return IDS_ESPECIES[chave]
+
+
+class Animal:
+    """Representação compacta do TAD animal (alternativa opcional ao dicionário devolvido por cria_animal).
+
+    Cada animal guarda apenas o id da sua espécie (na tabela ESPECIES), a idade e a fome; a espécie,
+    as frequências e a classificação predador/presa são lidas da tabela. Aceita o mesmo acesso por
+    chave que o dicionário (animal['idade']), pelo que todos os seletores e modificadores do TAD
+    funcionam sem alterações.
+    """
+    __slots__ = ('id_especie', 'idade', 'fome')
+
+    # acesso por chave delegado diretamente nos atributos (sem passar por código Python)
+    __getitem__ = object.__getattribute__
+    __setitem__ = object.__setattr__
+
+    especie = property(lambda self: ESPECIES[self.id_especie].nome)
+    reproducao = property(lambda self: ESPECIES[self.id_especie].reproducao)
+    alimentacao = property(lambda self: ESPECIES[self.id_especie].alimentacao)
+    predador = property(lambda self: ESPECIES[self.id_especie].predador)
+
+    def __init__(self, id_especie: int):
+        self.id_especie = id_especie
+        self.idade = 0
+        self.fome = 0
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Animal):
+            return NotImplemented
+
+        return self.id_especie == other.id_especie and self.idade == other.idade and self.fome == other.fome
+
+    def __reduce__(self) -> tuple:
+        # o id da espécie só é válido neste processo (a tabela ESPECIES de outro processo pode ter outra ordem):
+        # o animal é serializado pela espécie e registado de novo na tabela de quem o lê
+        especie = ESPECIES[self.id_especie]
+        return restaurar_animal_compacto, (especie.nome, especie.reproducao, especie.alimentacao, self.idade,
+                                           self.fome)
+
+
+def cria_animal_compacto(s: str, r: int, a: int) -> Animal:
+    """Igual a cria_animal, mas devolve o animal na representação compacta (Animal).
+
+    Args:
+        s (str): especie
+        r (int): freq de reprodução
+        a (int): freq de alimentação
+
+    Raises:
+        ValueError: 'cria_animal_compacto: argumentos invalidos'
+
+    Returns:
+        Animal: animal em representação compacta
+    """
+    if not isinstance(s, str) or not isinstance(r, int) or not isinstance(a, int):
+        raise ValueError('cria_animal_compacto: argumentos invalidos')
+
+    if len(s) == 0 or r <= 0 or a < 0:
+        raise ValueError('cria_animal_compacto: argumentos invalidos')
+
+    return Animal(obter_id_especie(s, r, a))
+
+
+def restaurar_animal_compacto(s: str, r: int, a: int, idade: int, fome: int) -> Animal:
+    """Recria um animal compacto serializado (ver Animal.__reduce__), registando a espécie na tabela deste processo.
+
+    Args:
+        s (str): especie
+        r (int): freq de reprodução
+        a (int): freq de alimentação
+        idade (int)
+        fome (int)
+
+    Returns:
+        Animal: animal
+    """
+    animal = cria_animal_compacto(s, r, a)
+    animal.idade = idade
+    animal.fome = fome
+
+    return animal
+
+
 def cria_copia_animal(animal: dict) -> dict:
-    """Recebe um animal (predador ou presa) e devolve uma nova cópia do animal.
+    """Recebe um animal (predador ou presa) e devolve uma nova cópia do animal, na mesma representação.
 
     Args:
         animal (dict): animal a copiar
@@ -223,6 +337,10 @@ def cria_copia_animal(animal: dict) -> dict:
     Returns:
         dict: cópia
     """
+    if isinstance(animal, Animal):
+        # a espécie já foi validada e registada quando o original foi criado
+        return Animal(animal.id_especie)
+
     especie = obter_especie(animal)
     reproducao = obter_freq_reproducao(animal)
     alimentacao = obter_freq_alimentacao(animal)
@@ -230,6 +348,22 @@ def cria_copia_animal(animal: dict) -> dict:
     return cria_animal(especie, reproducao, alimentacao)
 
 
+def duplicar_animal(animal: dict) -> dict:
+    """Devolve uma cópia independente do animal, na mesma representação e com a mesma idade e fome.
+
+    Args:
+        animal (dict)
+
+    Returns:
+        dict: cópia
+    """
+    copia = cria_copia_animal(animal)
+    copia['idade'] = obter_idade(animal)
+    copia['fome'] = obter_fome(animal)
+
+    return copia
+
+
 def obter_especie(animal: dict) -> str:
     """Devolve a cadeia de caracteres correspondente à espécie do animal.
 
@@ -357,6 +491,9 @@ def eh_animal(arg) -> bool:
     Returns:
         bool: é um tad animal?
     """
+    if isinstance(arg, Animal):
+        return True
+
     if not isinstance(arg, dict):
         return False
 
@@ -390,6 +527,9 @@ def eh_predador(arg) -> bool:
     Returns:
         bool: é um predador?
     """
+    if isinstance(arg, Animal):
+        return ESPECIES[arg.id_especie].predador
+
     return eh_animal(arg) and obter_freq_alimentacao(arg) != 0
 
 
@@ -403,6 +543,9 @@ def eh_presa(arg) -> bool:
     Returns:
         bool: é uma presa?
     """
+    if isinstance(arg, Animal):
+        return not ESPECIES[arg.id_especie].predador
+
     return eh_animal(arg) and obter_freq_alimentacao(arg) == 0
 
 
@@ -508,15 +651,7 @@ def existem_posicoes_repetidas(posicoes: tuple) -> bool:
     Returns:
         bool: existem repetidas?
     """
-    for i in range(len(posicoes)):
-        posicao1 = posicoes[i]
-        for j in range(i + 1, len(posicoes)):
-            posicao2 = posicoes[j]
-
-            if posicoes_iguais(posicao1, posicao2):
-                return True
-
-    return False
+    return len(set(posicoes)) != len(posicoes)
 
 
 def existem_posicoes_sobrepostas(posicoes_a_validar: tuple, posicoes_invalidas: tuple) -> bool:
@@ -529,11 +664,7 @@ def existem_posicoes_sobrepostas(posicoes_a_validar: tuple, posicoes_invalidas:
     Returns:
         bool: há sobrepostas?
     """
-    for posicao in posicoes_a_validar:
-        if posicao in posicoes_invalidas:
-            return True
-
-    return False
+    return not set(posicoes_invalidas).isdisjoint(posicoes_a_validar)
 
 
 def existem_posicoes_fora_do_prado(dimensao_prado: tuple, posicoes: tuple) -> bool:
@@ -606,7 +737,36 @@ def validar_prado(dimensao, rochedos: tuple, animais: tuple, posicoes: tuple) ->
     return True
 
 
-def cria_prado(d: tuple, r: tuple, a: tuple, p: tuple) -> dict:
+def criar_mapa_obstaculos(dimensao: tuple, rochedos: tuple) -> bytearray:
+    """Compila as montanhas (limites) e os rochedos do prado num mapa com um byte por célula,
+    indexado pelo valor numérico da posição (1 se a célula é obstáculo, 0 caso contrário).
+
+    Args:
+        dimensao (tuple): posição do canto inferior direito do prado
+        rochedos (tuple)
+
+    Returns:
+        bytearray: mapa de obstáculos
+    """
+    largura = obter_pos_x(dimensao) + 1
+    altura = obter_pos_y(dimensao) + 1
+
+    montanha = b"\x01" * largura
+    interior = b"\x01" + b"\x00" * (largura - 2) + b"\x01"
+    mapa = bytearray(montanha + interior * (altura - 2) + montanha)
+
+    for rochedo in rochedos:
+        mapa[obter_pos_x(rochedo) + largura * obter_pos_y(rochedo)] = 1
+
+    return mapa
+
+
+# os prados esparsos (ver cria_prado) são guardados em blocos de TAMANHO_BLOCO x TAMANHO_BLOCO células, alocados
+# apenas onde há animais
+TAMANHO_BLOCO = 16
+
+
+def cria_prado(d: tuple, r: tuple, a: tuple, p: tuple, esparso: bool = False) -> dict:
     """Cria o prado com d (dimensão), r (rochedos), a (animais), e p(posições dos animais)
 
     Args:
@@ -614,6 +774,9 @@ def cria_prado(d: tuple, r: tuple, a: tuple, p: tuple) -> dict:
         r (tuple): rochedos
         a (tuple): animais
         p (tuple): respetivas posições
+        esparso (bool): se True, a ocupação é guardada em blocos alocados apenas onde há animais e os rochedos num
+            conjunto, com memória proporcional ao conteúdo e não à área (os motores motor_numpy e as tabelas de
+            adjacências só existem para prados densos)
 
     Raises:
         ValueError: 'cria_prado: argumentos invalidos'
@@ -624,11 +787,62 @@ def cria_prado(d: tuple, r: tuple, a: tuple, p: tuple) -> dict:
     if not validar_prado(d, r, a, p):
         raise ValueError('cria_prado: argumentos invalidos')
 
-    return {'limite': d, 'rochedos': r, 'animais': a, 'posicoes': p}
+    return construir_prado(d, r, a, p, esparso)
+
+
+def construir_prado(d: tuple, r: tuple, a: tuple, p: tuple, esparso: bool = False) -> dict:
+    """Cria o prado como cria_prado, mas sem validar os argumentos. Só deve ser usada com estados produzidos pelo
+    próprio simulador ou já verificados (por exemplo, os checkpoints lidos por carregar_prado).
+
+    Args:
+        d (tuple): dimensão
+        r (tuple): rochedos
+        a (tuple): animais
+        p (tuple): respetivas posições
+        esparso (bool): ver cria_prado
+
+    Returns:
+        dict: prado
+    """
+    largura = obter_pos_x(d) + 1
+    altura = obter_pos_y(d) + 1
+
+    # ocupacao: blocos de células, cada um uma lista com o animal de cada célula (ou None); num prado denso cada
+    # linha y é um bloco (ocupacao[y][x]), num prado esparso é um dicionário só com os blocos que têm animais
+    # (ver obter_bloco)
+    # ocupadas: para cada bloco com animais, o conjunto dos valores numéricos das suas posições ocupadas (a ordem de
+    # leitura só é construída, ordenando-os, quando é pedida, uma vez por geração, para que cada movimento, nascimento
+    # e morte os atualize em tempo constante); os conjuntos são partilhados com as cópias do prado tal como os blocos
+    # linhas: representação em str de cada linha do prado, ou None se a linha mudou desde a última vez
+    # populacao: contadores de predadores, presas e animais de cada espécie, atualizados a cada entrada/saída,
+    # e o total acumulado de nascimentos e mortes (por predação e por fome) contados por iterar_animal
+    # proprias: 1 para cada bloco da ocupação (e animais nele) que pertence só a este prado, ou None se as listas
+    # acima ainda são partilhadas com uma cópia (ver cria_copia_prado)
+    if esparso:
+        prado = {'ocupacao': {}, 'obstaculos': frozenset(obter_pos_x(rochedo) + largura * obter_pos_y(rochedo) for rochedo in r),
+                 'linhas': {}, 'proprias': defaultdict(int), 'tamanho_bloco': TAMANHO_BLOCO}
+    else:
+        prado = {'ocupacao': [[None] * largura for _ in range(altura)], 'obstaculos': criar_mapa_obstaculos(d, r),
+                 'linhas': [None] * altura, 'proprias': bytearray(b'\x01') * altura, 'tamanho_bloco': 0}
+
+    prado.update({'limite': d, 'rochedos': r, 'ocupadas': {},
+                  'populacao': {'predadores': 0, 'presas': 0, 'especies': {}, 'nascimentos': 0, 'mortes_predacao': 0,
+                                'mortes_fome': 0}})
+
+    # as posições são distintas: os animais são colocados diretamente
+    ocupadas = prado['ocupadas']
+    for animal, posicao in zip(a, p):
+        chave, indice = obter_bloco(prado, posicao)
+        garantir_bloco_proprio(prado, chave)[indice] = animal
+        ocupadas.setdefault(chave, set()).add(obter_pos_x(posicao) + largura * obter_pos_y(posicao))
+        contar_animal(prado, animal, 1)
+
+    return prado
 
 
 def cria_copia_prado(prado: dict) -> dict:
-    """Cria uma cópia do prado
+    """Cria uma cópia do prado, em tempo constante: a cópia e o original partilham todo o estado até serem
+    alterados, e cada um só copia as listas, linhas e animais que modificar (copy-on-write).
 
     Args:
         prado (dict): prado a copiar
@@ -636,7 +850,97 @@ def cria_copia_prado(prado: dict) -> dict:
     Returns:
         dict: cópia
     """
-    return prado.copy()
+    copia = prado.copy()
+    # o mapa de obstáculos nunca é alterado depois de criado, pode ser partilhado para sempre
+    prado['proprias'] = copia['proprias'] = None
+
+    return copia
+
+
+def garantir_prado_proprio(prado: dict):
+    """Garante que a ocupação, as posições ocupadas, as linhas e os contadores da população pertencem só a este prado,
+    copiando-os se ainda forem partilhados com uma cópia (os blocos da ocupação, e os conjuntos das posições ocupadas
+    de cada bloco, continuam partilhados).
+
+    Args:
+        prado (dict)
+
+    Returns:
+        bytearray ou defaultdict: blocos da ocupação que pertencem só a este prado
+    """
+    if prado['proprias'] is None:
+        prado['ocupacao'] = prado['ocupacao'].copy()
+        prado['ocupadas'] = prado['ocupadas'].copy()
+        prado['linhas'] = prado['linhas'].copy()
+        prado['populacao'] = dict(prado['populacao'], especies=dict(prado['populacao']['especies']))
+        prado['proprias'] = defaultdict(int) if prado['tamanho_bloco'] else bytearray(len(prado['ocupacao']))
+
+    return prado['proprias']
+
+
+def garantir_bloco_proprio(prado: dict, chave: int) -> list:
+    """Garante que o bloco da ocupação, os animais nele e o conjunto das suas posições ocupadas pertencem só a este
+    prado (copiando-os se forem partilhados com uma cópia, ou alocando-o se o prado é esparso e o bloco ainda não
+    existe), para que possam ser alterados. Devolve o bloco.
+
+    Args:
+        prado (dict)
+        chave (int): chave do bloco (ver obter_bloco)
+
+    Returns:
+        list: bloco da ocupação
+    """
+    proprias = prado['proprias']
+    if proprias is not None and proprias[chave]:
+        return prado['ocupacao'][chave]
+
+    proprias = garantir_prado_proprio(prado)
+    ocupacao = prado['ocupacao']
+
+    if not proprias[chave]:
+        if prado['tamanho_bloco'] and chave not in ocupacao:
+            ocupacao[chave] = [None] * prado['tamanho_bloco'] ** 2
+        else:
+            ocupacao[chave] = [None if animal is None else duplicar_animal(animal) for animal in ocupacao[chave]]
+            if chave in prado['ocupadas']:
+                prado['ocupadas'][chave] = prado['ocupadas'][chave].copy()
+        proprias[chave] = 1
+
+    return ocupacao[chave]
+
+
+def obter_bloco(prado: dict, posicao: tuple) -> tuple:
+    """Devolve a chave do bloco da ocupação que contém a posição e o índice da posição dentro do bloco: num prado
+    denso, a linha e a coluna; num prado esparso, o número do bloco (em ordem de leitura dos blocos) e a célula
+    dentro do bloco.
+
+    Args:
+        prado (dict)
+        posicao (tuple)
+
+    Returns:
+        tuple: (chave, índice)
+    """
+    x = obter_pos_x(posicao)
+    y = obter_pos_y(posicao)
+    tamanho = prado['tamanho_bloco']
+
+    if not tamanho:
+        return y, x
+
+    return (y // tamanho) * (obter_tamanho_x(prado) // tamanho + 1) + x // tamanho, (y % tamanho) * tamanho + x % tamanho
+
+
+def eh_prado_esparso(prado: dict) -> bool:
+    """Devolve True se o prado é guardado em blocos esparsos (ver cria_prado).
+
+    Args:
+        prado (dict)
+
+    Returns:
+        bool: é esparso?
+    """
+    return prado['tamanho_bloco'] != 0
 
 
 def obter_tamanho_x(prado: dict) -> int:
@@ -672,7 +976,7 @@ def obter_numero_predadores(prado: dict) -> int:
     Returns:
         int: numero de predadores
     """
-    return len(list(filter(eh_predador, prado['animais'])))
+    return prado['populacao']['predadores']
 
 
 def obter_numero_presas(prado: dict) -> int:
@@ -684,7 +988,32 @@ def obter_numero_presas(prado: dict) -> int:
     Returns:
         int: numero de presas
     """
-    return len(list(filter(eh_presa, prado['animais'])))
+    return prado['populacao']['presas']
+
+
+def obter_populacao_especies(prado: dict) -> dict:
+    """Devolve o número de animais de cada espécie presente no prado.
+
+    Args:
+        prado (dict)
+
+    Returns:
+        dict: especie -> numero de animais
+    """
+    return dict(prado['populacao']['especies'])
+
+
+def obter_eventos(prado: dict) -> tuple:
+    """Devolve o total de nascimentos, mortes por predação e mortes por fome desde a criação do prado.
+
+    Args:
+        prado (dict)
+
+    Returns:
+        tuple: (nascimentos, mortes por predação, mortes por fome)
+    """
+    populacao = prado['populacao']
+    return populacao['nascimentos'], populacao['mortes_predacao'], populacao['mortes_fome']
 
 
 def obter_posicao_animais(prado: dict) -> tuple:
@@ -696,72 +1025,99 @@ def obter_posicao_animais(prado: dict) -> tuple:
     Returns:
         tuple: posições dos animais
     """
-    return ordenar_posicoes(prado['posicoes'])
+    largura = obter_tamanho_x(prado)
+    return tuple(cria_posicao(valor % largura, valor // largura) for valor in obter_valores_ocupados(prado))
 
 
-def obter_animal(prado: dict, posicao: tuple) -> dict:
-    """Devolve o animal do prado que se encontra na posição p.
+def obter_valores_ocupados(prado: dict, valor_inicial: int = 0, valor_final: int = None) -> list:
+    """Devolve, em ordem de leitura, os valores numéricos das posições ocupadas em [valor_inicial, valor_final)
+    (por omissão, todas). Só são percorridos os blocos das linhas do intervalo.
 
     Args:
         prado (dict)
-        posicao (tuple)
+        valor_inicial (int)
+        valor_final (int)
 
     Returns:
-        dict: animal
+        list: valores numéricos
     """
-    for i in range(len(prado['posicoes'])):
-        if posicoes_iguais(prado['posicoes'][i], posicao):
-            return prado['animais'][i]
-    return None
+    ocupadas = prado['ocupadas']
+    if valor_final is None:
+        return sorted(itertools.chain.from_iterable(ocupadas.values()))
+
+    largura = obter_tamanho_x(prado)
+    tamanho = prado['tamanho_bloco']
+
+    # intervalo de chaves dos blocos das linhas do intervalo de valores (ver obter_bloco)
+    linha_inicial = valor_inicial // largura
+    linha_final = (valor_final - 1) // largura
+    if tamanho:
+        blocos_por_linha = largura // tamanho + 1
+        chave_inicial = linha_inicial // tamanho * blocos_por_linha
+        chave_final = (linha_final // tamanho + 1) * blocos_por_linha
+    else:
+        chave_inicial, chave_final = linha_inicial, linha_final + 1
+
+    if chave_final - chave_inicial < len(ocupadas):
+        blocos = (ocupadas[chave] for chave in range(chave_inicial, chave_final) if chave in ocupadas)
+    else:
+        blocos = (bloco for chave, bloco in ocupadas.items() if chave_inicial <= chave < chave_final)
+
+    return sorted(valor for bloco in blocos for valor in bloco if valor_inicial <= valor < valor_final)
 
 
-def emendar_tuplo(tuplo: tuple, index: int, valor) -> tuple:
-    """Corrige o tuplo fornecido para os dados ficarem corretos
+def obter_animais(prado: dict) -> tuple:
+    """Devolve um tuplo com os animais do prado, em ordem de leitura do prado.
 
     Args:
-        tuplo (tuple)
-        index (int)
-        valor
+        prado (dict)
 
     Returns:
-        tuple: tuplo corrigido
+        tuple: animais
     """
-    lista = list(tuplo)
-    lista[index] = valor
-    return tuple(lista)
+    return tuple(obter_animal(prado, posicao) for posicao in obter_posicao_animais(prado))
 
 
-def remover_do_tuplo(tuplo: tuple, index: int) -> tuple:
-    """Remove o elemento com o index indicado do tuplo
+def obter_animal(prado: dict, posicao: tuple) -> dict:
+    """Devolve o animal do prado que se encontra na posição p.
 
     Args:
-        tuplo (tuple)
-        index (int)
+        prado (dict)
+        posicao (tuple)
 
     Returns:
-        tuple: tuplo corrigido
+        dict: animal
     """
-    return tuplo[0: index] + tuplo[index + 1:]
+    if prado['tamanho_bloco']:
+        if not (0 <= obter_pos_x(posicao) < obter_tamanho_x(prado) and 0 <= obter_pos_y(posicao) < obter_tamanho_y(prado)):
+            return None
+
+        chave, indice = obter_bloco(prado, posicao)
+        bloco = prado['ocupacao'].get(chave)
+        return None if bloco is None else bloco[indice]
+
+    try:
+        return prado['ocupacao'][obter_pos_y(posicao)][obter_pos_x(posicao)]
+    except IndexError:
+        return None
 
 
-def procurar_indice_posicao(posicoes, posicao: int) -> int:
-    """Procura o indice de uma determinada posição
+def obter_animal_proprio(prado: dict, posicao: tuple) -> dict:
+    """Devolve o animal do prado que se encontra na posição, garantindo que não é partilhado com nenhuma cópia do
+    prado (e pode, por isso, ser alterado).
 
     Args:
-        posicoes
-        posicao (int)
+        prado (dict)
+        posicao (tuple)
 
     Returns:
-        int: indice
+        dict: animal
     """
-    index_posicao_encontrada = -1
-
-    for i in range(len(posicoes)):
-        if posicoes_iguais(posicao, posicoes[i]):
-            index_posicao_encontrada = i
-            break
+    if obter_animal(prado, posicao) is None:
+        return None
 
-    return index_posicao_encontrada
+    chave, indice = obter_bloco(prado, posicao)
+    return garantir_bloco_proprio(prado, chave)[indice]
 
 
 def eliminar_animal(prado: dict, posicao_a_procurar: tuple) -> dict:
@@ -774,15 +1130,94 @@ def eliminar_animal(prado: dict, posicao_a_procurar: tuple) -> dict:
     Returns:
         dict: prado
     """
-    index_posicao_encontrada = procurar_indice_posicao(prado['posicoes'], posicao_a_procurar)
+    animal = retirar_da_grelha(prado, posicao_a_procurar)
 
-    if index_posicao_encontrada != -1:
-        prado['animais'] = remover_do_tuplo(prado['animais'], index_posicao_encontrada)
-        prado['posicoes'] = remover_do_tuplo(prado['posicoes'], index_posicao_encontrada)
+    if animal is not None:
+        contar_animal(prado, animal, -1)
 
     return prado
 
 
+def retirar_da_grelha(prado: dict, posicao: tuple) -> dict:
+    """Retira o animal da posição do índice de ocupação, das posições ocupadas e da representação das linhas, sem alterar os
+    contadores da população. Devolve o animal retirado (ou None se a posição estava livre).
+
+    Args:
+        prado (dict)
+        posicao (tuple)
+
+    Returns:
+        dict: animal retirado
+    """
+    animal = obter_animal(prado, posicao)
+
+    if animal is not None:
+        chave, indice = obter_bloco(prado, posicao)
+        bloco = garantir_bloco_proprio(prado, chave)
+        animal = bloco[indice]
+        bloco[indice] = None
+        prado['linhas'][obter_pos_y(posicao)] = None
+
+        ocupadas = prado['ocupadas'][chave]
+        ocupadas.discard(obter_valor_numerico(prado, posicao))
+        if not ocupadas:
+            del prado['ocupadas'][chave]
+
+            # num prado esparso, os blocos que ficam vazios são libertados
+            if prado['tamanho_bloco']:
+                del prado['ocupacao'][chave]
+                del prado['proprias'][chave]
+
+    return animal
+
+
+def colocar_na_grelha(prado: dict, animal: dict, posicao: tuple) -> dict:
+    """Coloca o animal na posição do índice de ocupação, das posições ocupadas e da representação das linhas, sem alterar os
+    contadores da população. Devolve o animal que lá estava antes (ou None).
+
+    Args:
+        prado (dict)
+        animal (dict)
+        posicao (tuple)
+
+    Returns:
+        dict: animal substituído
+    """
+    chave, indice = obter_bloco(prado, posicao)
+    bloco = garantir_bloco_proprio(prado, chave)
+    anterior = bloco[indice]
+
+    if anterior is None:
+        prado['ocupadas'].setdefault(chave, set()).add(obter_valor_numerico(prado, posicao))
+
+    bloco[indice] = animal
+    prado['linhas'][obter_pos_y(posicao)] = None
+
+    return anterior
+
+
+def contar_animal(prado: dict, animal: dict, variacao: int) -> None:
+    """Atualiza os contadores da população do prado (predadores/presas e por espécie) com a entrada ou saída do animal.
+
+    Args:
+        prado (dict)
+        animal (dict)
+        variacao (int): 1 se o animal entrou no prado, -1 se saiu
+    """
+    if prado['proprias'] is None:
+        garantir_prado_proprio(prado)
+
+    populacao = prado['populacao']
+    populacao['predadores' if eh_predador(animal) else 'presas'] += variacao
+
+    especies = populacao['especies']
+    especie = obter_especie(animal)
+    especies[especie] = especies.get(especie, 0) + variacao
+
+    if especies[especie] == 0:
+        del especies[especie]
+
+
 def mover_animal(prado: dict, posicao_inicial: tuple, posicao_final: tuple) -> dict:
     """modifica destrutivamente o prado movimentando o animal da posição p1 para a nova posição p2, deixando livre a posição onde
 se encontrava. Devolve o próprio prado.
@@ -795,10 +1230,13 @@ se encontrava. Devolve o próprio prado.
     Returns:
         dict: prado
     """
-    index_posicao_encontrada = procurar_indice_posicao(prado['posicoes'], posicao_inicial)
+    animal = retirar_da_grelha(prado, posicao_inicial)
 
-    if index_posicao_encontrada != -1:
-        prado['posicoes'] = emendar_tuplo(prado['posicoes'], index_posicao_encontrada, posicao_final)
+    if animal is not None:
+        anterior = colocar_na_grelha(prado, animal, posicao_final)
+
+        if anterior is not None:
+            contar_animal(prado, anterior, -1)
 
     return prado
 
@@ -815,8 +1253,12 @@ def inserir_animal(prado: dict, animal: dict, posicao: tuple) -> dict:
     Returns:
         dict: prado
     """
-    prado['animais'] += (animal,)
-    prado['posicoes'] += (posicao,)
+    anterior = colocar_na_grelha(prado, animal, posicao)
+
+    if anterior is not None:
+        contar_animal(prado, anterior, -1)
+
+    contar_animal(prado, animal, 1)
 
     return prado
 
@@ -832,11 +1274,40 @@ def eh_prado(arg) -> bool:
     """
     if not isinstance(arg, dict):
         return False
-    if len(arg) != 4:
+    if arg.keys() != {'limite', 'rochedos', 'ocupacao', 'ocupadas', 'obstaculos', 'linhas', 'populacao', 'proprias',
+                      'tamanho_bloco'}:
+        return False
+    if nao_eh_posicao(arg['limite']) or not isinstance(arg['ocupadas'], dict) or not isinstance(arg['tamanho_bloco'], int):
+        return False
+    if eh_prado_esparso(arg):
+        if not isinstance(arg['ocupacao'], dict) or not isinstance(arg['linhas'], dict):
+            return False
+        if arg['proprias'] is not None and not isinstance(arg['proprias'], defaultdict):
+            return False
+        if not isinstance(arg['obstaculos'], frozenset) or len(arg['obstaculos']) != len(arg['rochedos']):
+            return False
+        if exists(lambda bloco: not isinstance(bloco, list) or len(bloco) != arg['tamanho_bloco'] ** 2,
+                  arg['ocupacao'].values()):
+            return False
+    else:
+        if not isinstance(arg['linhas'], list) or len(arg['linhas']) != obter_tamanho_y(arg):
+            return False
+        if arg['proprias'] is not None and (not isinstance(arg['proprias'], bytearray)
+                                            or len(arg['proprias']) != len(arg['linhas'])):
+            return False
+        if not isinstance(arg['ocupacao'], list) or len(arg['ocupacao']) != obter_tamanho_y(arg):
+            return False
+        if not isinstance(arg['obstaculos'], bytearray) or len(arg['obstaculos']) != obter_tamanho_x(arg) * obter_tamanho_y(arg):
+            return False
+        if exists(lambda linha: not isinstance(linha, list) or len(linha) != obter_tamanho_x(arg), arg['ocupacao']):
+            return False
+    if exists(lambda posicao: obter_animal(arg, posicao) is None, obter_posicao_animais(arg)):
+        return False
+    if not validar_prado(arg["limite"], arg["rochedos"], obter_animais(arg), obter_posicao_animais(arg)):
         return False
-    if 'limite'not in arg.keys() or 'rochedos' not in arg.keys() or 'animais' not in arg.keys() or 'posicoes' not in arg.keys():
+    if obter_numero_predadores(arg) != len(list(filter(eh_predador, obter_animais(arg)))):
         return False
-    if not validar_prado(arg["limite"], arg["rochedos"], arg["animais"], arg["posicoes"]):
+    if obter_numero_presas(arg) != len(list(filter(eh_presa, obter_animais(arg)))):
         return False
     return True
 
@@ -851,11 +1322,7 @@ def eh_posicao_animal(prado: dict, posicao_a_procurar: tuple) -> bool:
     Returns:
         bool: é uma posição com animal?
     """
-    for posicao in obter_posicao_animais(prado):
-        if posicoes_iguais(posicao_a_procurar, posicao):
-            return True
-
-    return False
+    return obter_animal(prado, posicao_a_procurar) is not None
 
 
 def eh_posicao_obstaculo(prado: dict, pos: tuple) -> bool:
@@ -870,17 +1337,18 @@ def eh_posicao_obstaculo(prado: dict, pos: tuple) -> bool:
     """
     pos_x = obter_pos_x(pos)
     pos_y = obter_pos_y(pos)
+    largura = obter_tamanho_x(prado)
+    dentro = pos_x < largura and pos_y < obter_tamanho_y(prado)
 
-    if pos_x == 0 or pos_x == obter_tamanho_x(prado) - 1:
-        return True
-    if pos_y == 0 or pos_y == obter_tamanho_y(prado) - 1:
-        return True
+    if dentro and not prado['tamanho_bloco']:
+        return prado['obstaculos'][pos_x + largura * pos_y] == 1
 
-    for p in prado['rochedos']:
-        if posicoes_iguais(p, pos):
-            return True
+    # fora do prado só as linhas das montanhas contam como obstáculo
+    if pos_x == 0 or pos_x == largura - 1 or pos_y == 0 or pos_y == obter_tamanho_y(prado) - 1:
+        return True
 
-    return False
+    # num prado esparso, os obstáculos são o conjunto dos valores numéricos dos rochedos
+    return dentro and pos_x + largura * pos_y in prado['obstaculos']
 
 
 def eh_posicao_livre(prado: dict, pos: tuple) -> bool:
@@ -906,7 +1374,13 @@ def prados_iguais(p1: dict, p2: dict) -> bool:
     Returns:
         bool: são iguais?
     """
-    return p1 == p2
+    if p1['tamanho_bloco'] != p2['tamanho_bloco']:
+        return (p1['limite'] == p2['limite'] and set(p1['rochedos']) == set(p2['rochedos'])
+                and obter_valores_ocupados(p1) == obter_valores_ocupados(p2)
+                and obter_animais(p1) == obter_animais(p2))
+
+    # o mapa de obstáculos já representa os rochedos, independentemente da ordem em que foram dados
+    return p1['limite'] == p2['limite'] and p1['obstaculos'] == p2['obstaculos'] and p1['ocupacao'] == p2['ocupacao']
 
 
 def prado_para_str(prado: dict) -> str:
@@ -918,41 +1392,65 @@ def prado_para_str(prado: dict) -> str:
     Returns:
         str: prado em str
     """
+    inicio = iniciar_fase()
     largura = obter_tamanho_x(prado)
     comprimento = obter_tamanho_y(prado)
+    linhas = prado['linhas']
 
-    representacao = "+" + ("-" * (largura - 2)) + "+" + "\n"
-
+    # só as linhas alteradas desde a última representação são reconstruídas
     for y in range(1, comprimento - 1):
-        representacao += "|"
+        if linhas.get(y) is None if prado['tamanho_bloco'] else linhas[y] is None:
+            linhas[y] = linha_para_str(prado, y)
 
-        for x in range(1, largura - 1):
-            posicao = cria_posicao(x, y)
-
-            if eh_posicao_animal(prado, posicao):
-                representacao += animal_para_char(obter_animal(prado, posicao))
-            elif eh_posicao_obstaculo(prado, posicao):
-                representacao += "@"
-            else:
-                representacao += "."
+    montanha = "+" + ("-" * (largura - 2)) + "+"
+    representacao = "\n".join([montanha] + [linhas[y] for y in range(1, comprimento - 1)] + [montanha])
+    terminar_fase('representacao', inicio)
 
-        representacao += "|\n"
+    return representacao
 
-    return representacao + "+" + ("-" * (largura - 2)) + "+"
 
-
-def obter_valor_numerico(prado: dict, posicao: tuple) -> int:
-    """Devolve o valor numerico da posicao, correspondente à ordem de leitura do prado.
+def linha_para_str(prado: dict, y: int) -> str:
+    """Devolve a cadeia de caracteres que representa a linha y do prado (incluindo as montanhas laterais).
 
     Args:
         prado (dict)
-        posicao (tuple)
+        y (int): linha
 
     Returns:
-        int: valor numerico
+        str: linha em str
     """
     largura = obter_tamanho_x(prado)
-    x = obter_pos_x(posicao)
+    obstaculos = prado['obstaculos']
+    inicio = largura * y
+
+    if prado['tamanho_bloco']:
+        caracteres = []
+        for x in range(1, largura - 1):
+            animal = obter_animal(prado, cria_posicao(x, y))
+            caracteres.append(animal_para_char(animal) if animal is not None
+                              else "@" if eh_posicao_obstaculo(prado, cria_posicao(x, y)) else ".")
+        return "|" + "".join(caracteres) + "|"
+
+    caracteres = [
+        animal_para_char(animal) if animal is not None else "@" if obstaculos[inicio + x] else "."
+        for x, animal in enumerate(prado['ocupacao'][y][1:largura - 1], start=1)
+    ]
+
+    return "|" + "".join(caracteres) + "|"
+
+
+def obter_valor_numerico(prado: dict, posicao: tuple) -> int:
+    """Devolve o valor numerico da posicao, correspondente à ordem de leitura do prado.
+
+    Args:
+        prado (dict)
+        posicao (tuple)
+
+    Returns:
+        int: valor numerico
+    """
+    largura = obter_tamanho_x(prado)
+    x = obter_pos_x(posicao)
     y = obter_pos_y(posicao)
 
     return x + largura * y
@@ -1001,6 +1499,108 @@ def filtrar_posicoes_adjacentes(prado: dict, posicoes_adjacentes: tuple, animal:
     return posicoes_filtradas
 
 
+# tabelas de adjacências dos prados densos, por geometria (limite, rochedos), das usadas há mais tempo para as
+# usadas há menos tempo (as primeiras são descartadas quando o total passa de MAXIMO_BYTES_ADJACENCIAS, um byte por
+# célula de cada tabela), e a última usada
+ADJACENCIAS = {}
+MAXIMO_BYTES_ADJACENCIAS = 1 << 26
+ULTIMA_ADJACENCIA = [None, None, None]
+
+# deslocamentos (dx, dy) das posições adjacentes que não são obstáculos, no sentido horário a partir de cima, para
+# cada máscara da tabela de adjacências (bit 0: acima, bit 1: direita, bit 2: abaixo, bit 3: esquerda)
+VIZINHOS_MASCARA = tuple(
+    tuple(deslocamento for bit, deslocamento in enumerate(((0, -1), (1, 0), (0, 1), (-1, 0))) if mascara >> bit & 1)
+    for mascara in range(16)
+)
+INVERTER_OBSTACULOS = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+def criar_tabela_adjacencias(dimensao: tuple, rochedos: tuple) -> bytes:
+    """Cria a tabela de adjacências de uma geometria: um byte por célula, indexado pelo valor numérico da posição,
+    com a máscara das posições adjacentes que não são obstáculos (ver VIZINHOS_MASCARA). Só as células interiores
+    têm máscaras com significado.
+
+    Args:
+        dimensao (tuple): posição do canto inferior direito do prado
+        rochedos (tuple)
+
+    Returns:
+        bytes: tabela de adjacências
+    """
+    largura = obter_pos_x(dimensao) + 1
+    area = largura * (obter_pos_y(dimensao) + 1)
+
+    # cada célula é um byte de um inteiro (1 se livre de obstáculos), pelo que deslocar o inteiro um byte ou uma
+    # linha de bytes junta a cada célula o vizinho correspondente, sem transporte entre bytes
+    livres = int.from_bytes(criar_mapa_obstaculos(dimensao, rochedos).translate(INVERTER_OBSTACULOS), 'little')
+    mascaras = ((livres << 8 * largura) | (livres >> 8) << 1 | (livres >> 8 * largura) << 2 | (livres << 8) << 3)
+
+    return mascaras.to_bytes(area + largura + 1, 'little')[:area]
+
+
+def obter_tabela_adjacencias(prado: dict) -> bytes:
+    """Devolve a tabela de adjacências (ver criar_tabela_adjacencias) de um prado denso, criando-a apenas na
+    primeira vez que a sua geometria é usada (ou depois de ter sido descartada da cache).
+
+    Args:
+        prado (dict)
+
+    Returns:
+        bytes: tabela de adjacências
+    """
+    limite = prado['limite']
+    rochedos = prado['rochedos']
+
+    # caso comum: o mesmo prado (ou cópias suas, que partilham os rochedos) em gerações seguidas
+    if ULTIMA_ADJACENCIA[0] is rochedos and ULTIMA_ADJACENCIA[1] == limite:
+        return ULTIMA_ADJACENCIA[2]
+
+    geometria = (limite, rochedos)
+    tabela = ADJACENCIAS.pop(geometria, None)
+    if tabela is None:
+        tabela = criar_tabela_adjacencias(limite, rochedos)
+        # a nova tabela fica sempre na cache, mesmo que sozinha passe do máximo
+        total = sum(map(len, ADJACENCIAS.values())) + len(tabela)
+        while ADJACENCIAS and total > MAXIMO_BYTES_ADJACENCIAS:
+            total -= len(ADJACENCIAS.pop(next(iter(ADJACENCIAS))))
+
+    ADJACENCIAS[geometria] = tabela
+    ULTIMA_ADJACENCIA[:] = rochedos, limite, tabela
+
+    return tabela
+
+
+def limpar_adjacencias() -> None:
+    """Descarta todas as tabelas de adjacências guardadas (ver obter_tabela_adjacencias), por exemplo depois de
+    simular prados grandes que não voltam a ser usados.
+    """
+    ADJACENCIAS.clear()
+    ULTIMA_ADJACENCIA[:] = None, None, None
+
+
+def obter_vizinho_escolhido(ocupacao: list, x: int, y: int, vizinhos: tuple, presas: bool, escolha: int) -> tuple:
+    """Devolve a posição do vizinho escolhido entre os vizinhos (deslocamentos de VIZINHOS_MASCARA) de (x, y) que
+    têm uma presa (presas=True) ou estão livres (presas=False), contando a partir de 0 no sentido horário.
+
+    Args:
+        ocupacao (list): ocupação de um prado denso
+        x (int)
+        y (int)
+        vizinhos (tuple)
+        presas (bool)
+        escolha (int)
+
+    Returns:
+        tuple: posição escolhida
+    """
+    for dx, dy in vizinhos:
+        ocupante = ocupacao[y + dy][x + dx]
+        if eh_presa(ocupante) if presas else ocupante is None:
+            if escolha == 0:
+                return cria_posicao(x + dx, y + dy)
+            escolha -= 1
+
+
 def obter_movimento(prado: dict, pos: tuple) -> tuple:
     """DEvolve a posição seguinte do animal com base na sua posição atual.
 
@@ -1011,19 +1611,124 @@ def obter_movimento(prado: dict, pos: tuple) -> tuple:
     Returns:
         tuple: posição seguinte
     """
-    posicoes_adjacentes = obter_posicoes_adjacentes(pos)
-    valor_posicao_atual = obter_valor_numerico(prado, pos)
+    if prado['tamanho_bloco']:
+        posicoes_adjacentes = obter_posicoes_adjacentes(pos)
+        valor_posicao_atual = obter_valor_numerico(prado, pos)
+
+        animal = obter_animal(prado, pos)
+
+        posicoes_possiveis = filtrar_posicoes_adjacentes(prado, posicoes_adjacentes, animal)
+        len_posicoes_possiveis = len(posicoes_possiveis)
+
+        if len_posicoes_possiveis == 0:
+            return pos
+
+        index_posicao_escolhida = valor_posicao_atual % len_posicoes_possiveis
+        return posicoes_possiveis[index_posicao_escolhida]
+
+    # num prado denso, os vizinhos que não são obstáculos vêm da tabela de adjacências da geometria do prado, e as
+    # candidatas são contadas e depois escolhidas sem construir listas de posições
+    x = obter_pos_x(pos)
+    y = obter_pos_y(pos)
+    valor_posicao_atual = x + obter_tamanho_x(prado) * y
+    vizinhos = VIZINHOS_MASCARA[obter_tabela_adjacencias(prado)[valor_posicao_atual]]
+    ocupacao = prado['ocupacao']
 
-    animal = obter_animal(prado, pos)
+    if eh_predador(ocupacao[y][x]):
+        nr_presas = 0
+        for dx, dy in vizinhos:
+            if eh_presa(ocupacao[y + dy][x + dx]):
+                nr_presas += 1
 
-    posicoes_possiveis = filtrar_posicoes_adjacentes(prado, posicoes_adjacentes, animal)
-    len_posicoes_possiveis = len(posicoes_possiveis)
+        if nr_presas > 0:
+            return obter_vizinho_escolhido(ocupacao, x, y, vizinhos, True, valor_posicao_atual % nr_presas)
 
-    if len_posicoes_possiveis == 0:
+    nr_livres = 0
+    for dx, dy in vizinhos:
+        if ocupacao[y + dy][x + dx] is None:
+            nr_livres += 1
+
+    if nr_livres == 0:
         return pos
 
-    index_posicao_escolhida = valor_posicao_atual % len_posicoes_possiveis
-    return posicoes_possiveis[index_posicao_escolhida]
+    return obter_vizinho_escolhido(ocupacao, x, y, vizinhos, False, valor_posicao_atual % nr_livres)
+
+
+# instrumentação opcional: None quando desativada (cada fase custa apenas esta verificação)
+INSTRUMENTACAO = None
+FASES = ('geracao', 'movimento', 'alimentacao', 'reproducao', 'fome', 'representacao')
+
+
+def ativar_instrumentacao() -> dict:
+    """Ativa a recolha do número de chamadas e do tempo acumulado de cada fase, no total e por geração.
+
+    Returns:
+        dict: dados recolhidos, {'total': {fase: [chamadas, segundos]}, 'geracoes': [{fase: [chamadas, segundos]}]}
+    """
+    global INSTRUMENTACAO
+    INSTRUMENTACAO = {'total': {fase: [0, 0.0] for fase in FASES}, 'geracoes': []}
+
+    return INSTRUMENTACAO
+
+
+def desativar_instrumentacao() -> dict:
+    """Desativa a instrumentação e devolve os dados recolhidos (ou None se não estava ativa).
+
+    Returns:
+        dict: dados recolhidos
+    """
+    global INSTRUMENTACAO
+    dados, INSTRUMENTACAO = INSTRUMENTACAO, None
+
+    return dados
+
+
+def iniciar_fase() -> float:
+    """Devolve o instante de início de uma fase (0 se a instrumentação estiver desativada).
+
+    Returns:
+        float: instante
+    """
+    return time.perf_counter() if INSTRUMENTACAO is not None else 0.0
+
+
+def terminar_fase(fase: str, inicio: float) -> None:
+    """Regista uma chamada da fase iniciada no instante dado, no total e na geração atual.
+
+    Args:
+        fase (str)
+        inicio (float): valor devolvido por iniciar_fase
+    """
+    if INSTRUMENTACAO is None:
+        return
+
+    segundos = time.perf_counter() - inicio
+    contadores = [INSTRUMENTACAO['total'][fase]]
+    if INSTRUMENTACAO['geracoes']:
+        contadores.append(INSTRUMENTACAO['geracoes'][-1].setdefault(fase, [0, 0.0]))
+
+    for contador in contadores:
+        contador[0] += 1
+        contador[1] += segundos
+
+
+def resumo_instrumentacao(dados: dict) -> str:
+    """Devolve uma tabela com as chamadas e o tempo total e médio de cada fase.
+
+    Args:
+        dados (dict): dados devolvidos por ativar_instrumentacao/desativar_instrumentacao
+
+    Returns:
+        str: resumo
+    """
+    linhas = [f"{'fase':<14}{'chamadas':>12}{'segundos':>14}{'us/chamada':>14}"]
+
+    for fase in FASES:
+        chamadas, segundos = dados['total'][fase]
+        media = segundos / chamadas * 1e6 if chamadas else 0.0
+        linhas.append(f"{fase:<14}{chamadas:>12}{segundos:>14.6f}{media:>14.2f}")
+
+    return "\n".join(linhas + [f"geracoes: {len(dados['geracoes'])}"])
 
 
 def iterar_animal(prado, animal, posicao_atual, posicao_destino) -> bool:
@@ -1045,56 +1750,437 @@ def iterar_animal(prado, animal, posicao_atual, posicao_destino) -> bool:
 
     if not posicoes_iguais(posicao_atual, posicao_destino):
         if pode_comer_animal(prado, animal, posicao_destino):
+            inicio = iniciar_fase()
             eliminar_animal(prado, posicao_destino)
             reset_fome(animal)
             comeu_presa = True
+            prado['populacao']['mortes_predacao'] += 1
+            terminar_fase('alimentacao', inicio)
 
         mover_animal(prado, posicao_atual, posicao_destino)
 
         if eh_animal_fertil(animal):
+            inicio = iniciar_fase()
             filho = reproduz_animal(animal)
             inserir_animal(prado, filho, posicao_atual)
+            prado['populacao']['nascimentos'] += 1
+            terminar_fase('reproducao', inicio)
 
     if eh_animal_faminto(animal):
+        inicio = iniciar_fase()
         eliminar_animal(prado, posicao_destino)
+        prado['populacao']['mortes_fome'] += 1
+        terminar_fase('fome', inicio)
 
     return comeu_presa
 
 
-def geracao(prado: dict) -> dict:
+# deslocamento de cada direção de movimento registada no diário (0 = ficou parado), e o inverso
+DESLOCAMENTOS = ((0, 0), (0, -1), (1, 0), (0, 1), (-1, 0))
+DIRECOES = {deslocamento: direcao for direcao, deslocamento in enumerate(DESLOCAMENTOS)}
+
+
+def geracao(prado: dict, registo: bytearray = None, movimentos: bytes = None) -> dict:
     """É a funçãao auxiliar que modifica o prado fornecido como argumento de acordo com a evolução correspondente a uma geração completa, 
     e devolve o próprio prado. Isto é, seguindo a ordem de leitura do prado, cada animal (vivo) realiza o seu turno de ação. 
 
     Args:
         prado (dict)
+        registo (bytearray): se dado, é-lhe acrescentada a direção (índice de DESLOCAMENTOS) de cada turno
+        movimentos (bytes): direções de cada turno já registadas, usadas em vez de obter_movimento
 
     Returns:
         dict: prado
     """
-    posicoes_por_validar = list(obter_posicao_animais(prado))
+    if INSTRUMENTACAO is not None:
+        INSTRUMENTACAO['geracoes'].append({})
+    inicio_geracao = iniciar_fase()
+
+    iterar_turnos(prado, obter_posicao_animais(prado), set(), registo, movimentos)
 
-    while len(posicoes_por_validar) > 0:
-        posicao_atual = posicoes_por_validar.pop(0)
+    terminar_fase('geracao', inicio_geracao)
 
-        animal_iterante = obter_animal(prado, posicao_atual)
-        posicao_destino = obter_movimento(prado, posicao_atual)
+    return prado
+
+
+def iterar_turnos(prado: dict, posicoes, posicoes_comidas: set, registo: bytearray = None,
+                  movimentos: bytes = None) -> list:
+    """Realiza o turno de ação do animal de cada uma das posições, pela ordem dada, ignorando as posições de presas
+    já comidas (posicoes_comidas, que é atualizado com as presas comidas nestes turnos).
+
+    Args:
+        prado (dict)
+        posicoes: posições dos animais, em ordem de leitura
+        posicoes_comidas (set)
+        registo (bytearray): ver geracao
+        movimentos (bytes): ver geracao
+
+    Returns:
+        list: posições das presas comidas nestes turnos
+    """
+    comidas = []
+    turno = 0
+
+    for posicao_atual in posicoes:
+        if posicao_atual in posicoes_comidas:
+            continue
+
+        animal_iterante = obter_animal_proprio(prado, posicao_atual)
+
+        inicio = iniciar_fase()
+        if movimentos is None:
+            posicao_destino = obter_movimento(prado, posicao_atual)
+        else:
+            dx, dy = DESLOCAMENTOS[movimentos[turno]]
+            posicao_destino = cria_posicao(obter_pos_x(posicao_atual) + dx, obter_pos_y(posicao_atual) + dy)
+        terminar_fase('movimento', inicio)
+
+        if registo is not None:
+            registo.append(DIRECOES[(obter_pos_x(posicao_destino) - obter_pos_x(posicao_atual),
+                                     obter_pos_y(posicao_destino) - obter_pos_y(posicao_atual))])
+        turno += 1
 
         comeu_presa = iterar_animal(prado, animal_iterante, posicao_atual, posicao_destino)
 
         if comeu_presa:
             # se um predados, ao comer (elimina presa do prado),
             # move-se para uma posicao para a direita ou para baixo
-            # será necessário remover essa posicao (onde estava uma presa por iterar) das posicoes a validar,
+            # será necessário ignorar essa posicao (onde estava uma presa por iterar) nas posicoes a validar,
             # senão esse animal (que já não é uma presa, mas um predador),
             # iterava duas vezes o predador.
-            index_posicao = procurar_indice_posicao(posicoes_por_validar, posicao_destino)
+            posicoes_comidas.add(posicao_destino)
+            comidas.append(posicao_destino)
+
+    return comidas
+
+
+def criar_diario(prado: dict, intervalo_keyframes: int = 100) -> dict:
+    """Cria o diário de uma simulação a partir do prado (geração 0). As gerações feitas com registar_geracao ficam
+    registadas como deltas, e a cada intervalo_keyframes gerações é guardada uma cópia do prado (keyframe), pelo
+    que reconstruir qualquer geração custa no máximo uma cópia e intervalo_keyframes - 1 deltas.
 
-            if index_posicao != -1:
-                posicoes_por_validar.pop(index_posicao)
+    Cada delta é a direção do movimento de cada animal, pela ordem dos turnos (um byte por turno): as caças,
+    nascimentos, mortes por fome e alterações de idade e fome resultam deterministicamente dos movimentos.
+
+    Args:
+        prado (dict): prado a simular (alterado destrutivamente por registar_geracao)
+        intervalo_keyframes (int)
+
+    Raises:
+        ValueError: 'criar_diario: argumentos invalidos'
+
+    Returns:
+        dict: diário
+    """
+    if type(intervalo_keyframes) != int or intervalo_keyframes <= 0:
+        raise ValueError('criar_diario: argumentos invalidos')
+
+    return {'prado': prado, 'intervalo': intervalo_keyframes, 'keyframes': [cria_copia_prado(prado)], 'deltas': []}
+
+
+def registar_geracao(diario: dict) -> dict:
+    """Avança uma geração do prado do diário, registando-a. Devolve o prado.
+
+    Args:
+        diario (dict)
+
+    Returns:
+        dict: prado
+    """
+    registo = bytearray()
+    prado = geracao(diario['prado'], registo)
+    diario['deltas'].append(bytes(registo))
+
+    if len(diario['deltas']) % diario['intervalo'] == 0:
+        diario['keyframes'].append(cria_copia_prado(prado))
 
     return prado
 
 
+def obter_numero_geracoes_diario(diario: dict) -> int:
+    """Devolve o número de gerações registadas no diário.
+
+    Args:
+        diario (dict)
+
+    Returns:
+        int: número de gerações
+    """
+    return len(diario['deltas'])
+
+
+def reconstruir_geracao(diario: dict, nr_geracao: int) -> dict:
+    """Devolve um novo prado com o estado da geração dada (para a frente ou para trás da geração atual), a partir
+    do keyframe anterior mais próximo e dos deltas seguintes, sem voltar a calcular os movimentos.
+
+    Args:
+        diario (dict)
+        nr_geracao (int): entre 0 e o número de gerações registadas
+
+    Raises:
+        ValueError: 'reconstruir_geracao: argumentos invalidos'
+
+    Returns:
+        dict: prado
+    """
+    if type(nr_geracao) != int or not 0 <= nr_geracao <= obter_numero_geracoes_diario(diario):
+        raise ValueError('reconstruir_geracao: argumentos invalidos')
+
+    keyframe = nr_geracao // diario['intervalo']
+    prado = cria_copia_prado(diario['keyframes'][keyframe])
+
+    for movimentos in diario['deltas'][keyframe * diario['intervalo']:nr_geracao]:
+        geracao(prado, movimentos=movimentos)
+
+    return prado
+
+
+# formato do ficheiro do prado: (x, y) / ((x, y), ...) / ('especie', reproducao, alimentacao, (x, y))
+PADRAO_POSICAO = r"\(\s*(\d+)\s*,\s*(\d+)\s*\)"
+RE_DIMENSAO = re.compile(r"\s*" + PADRAO_POSICAO + r"\s*")
+RE_ROCHEDOS = re.compile(r"\s*\(\s*(?:" + PADRAO_POSICAO + r"\s*(?:,\s*" + PADRAO_POSICAO + r"\s*)*,?\s*)?\)\s*")
+RE_POSICAO = re.compile(PADRAO_POSICAO)
+RE_ANIMAL = re.compile(r"""\s*\(\s*(?:'([^']*)'|"([^"]*)")\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*""" + PADRAO_POSICAO
+                       + r"\s*,?\s*\)\s*")
+
+
+def ler_prado(nome_ficheiro: str, esparso: bool = False) -> dict:
+    """Lê o ficheiro de um prado (linha da dimensão, linha dos rochedos e um animal por linha) e devolve o prado.
+    O ficheiro é lido linha a linha, sem eval, e os animais são criados na representação compacta.
+
+    Args:
+        nome_ficheiro (str)
+        esparso (bool): ver cria_prado
+
+    Raises:
+        ValueError: 'ler_prado: linha <n> invalida'
+
+    Returns:
+        dict: prado
+    """
+    animais = []
+    posicoes = []
+
+    with open(nome_ficheiro, 'r') as fp:
+        linha = fp.readline()
+        dimensao = RE_DIMENSAO.fullmatch(linha)
+        if dimensao is None:
+            raise ValueError('ler_prado: linha 1 invalida')
+
+        linha = fp.readline()
+        if RE_ROCHEDOS.fullmatch(linha) is None:
+            raise ValueError('ler_prado: linha 2 invalida')
+        rochedos = tuple(cria_posicao(int(x), int(y)) for x, y in RE_POSICAO.findall(linha))
+
+        for nr_linha, linha in enumerate(fp, start=3):
+            if linha.isspace():
+                continue
+
+            animal = RE_ANIMAL.fullmatch(linha)
+            if animal is None:
+                raise ValueError(f'ler_prado: linha {nr_linha} invalida')
+
+            especie, especie_aspas, reproducao, alimentacao, x, y = animal.groups()
+            try:
+                animais.append(cria_animal_compacto(especie if especie is not None else especie_aspas,
+                                                    int(reproducao), int(alimentacao)))
+            except ValueError as erro:
+                raise ValueError(f'ler_prado: linha {nr_linha} invalida') from erro
+
+            posicoes.append(cria_posicao(int(x), int(y)))
+
+    return cria_prado(cria_posicao(int(dimensao[1]), int(dimensao[2])), rochedos, tuple(animais), tuple(posicoes),
+                      esparso)
+
+
+# checkpoint binário: cabeçalho, tabela de espécies, mapa de bits dos rochedos e registos dos animais
+# (nos prados esparsos, em vez do mapa de bits, o número de rochedos e o valor numérico de cada um)
+MAGIC_CHECKPOINT = b'PRD2'
+MAGIC_CHECKPOINT_ESPARSO = b'PRS2'
+# magic, resumo do ficheiro do prado de origem (ver obter_resumo_ficheiro), limite x, limite y, geração,
+# nº espécies, nº animais
+CABECALHO_CHECKPOINT = struct.Struct('<4s32sIIQII')
+ESPECIE_CHECKPOINT = struct.Struct('<HII')  # tamanho do nome, reprodução, alimentação (seguido do nome em utf-8)
+ANIMAL_CHECKPOINT = struct.Struct('<QIII')  # valor numérico da posição, id da espécie, idade, fome
+ROCHEDO_CHECKPOINT = struct.Struct('<Q')  # nº de rochedos e valor numérico de cada rochedo (prados esparsos)
+RE_BYTE_NAO_NULO = re.compile(b'[^\x00]')
+ORIGEM_DESCONHECIDA = bytes(32)
+
+
+def obter_resumo_ficheiro(nome_ficheiro: str) -> bytes:
+    """Devolve o resumo (sha256) do conteúdo do ficheiro, usado para associar um checkpoint ao ficheiro do prado
+    de onde a simulação partiu.
+
+    Args:
+        nome_ficheiro (str)
+
+    Returns:
+        bytes: resumo com 32 bytes
+    """
+    with open(nome_ficheiro, 'rb') as fp:
+        return hashlib.sha256(fp.read()).digest()
+
+
+def guardar_prado(prado: dict, nome_ficheiro: str, nr_geracao: int = 0, origem: bytes = ORIGEM_DESCONHECIDA) -> None:
+    """Guarda o prado (e o número da geração) num checkpoint binário. O ficheiro é substituído de forma atómica.
+
+    Args:
+        prado (dict)
+        nome_ficheiro (str)
+        nr_geracao (int): geração a que corresponde o prado
+        origem (bytes): resumo do ficheiro do prado de origem (ver obter_resumo_ficheiro)
+    """
+    largura = obter_tamanho_x(prado)
+    especies = {}
+    registos = []
+
+    for posicao in obter_posicao_animais(prado):
+        animal = obter_animal(prado, posicao)
+        chave = (obter_especie(animal), obter_freq_reproducao(animal), obter_freq_alimentacao(animal))
+        id_especie = especies.setdefault(chave, len(especies))
+        registos.append(ANIMAL_CHECKPOINT.pack(obter_valor_numerico(prado, posicao), id_especie,
+                                               obter_idade(animal), obter_fome(animal)))
+
+    if eh_prado_esparso(prado):
+        magic = MAGIC_CHECKPOINT_ESPARSO
+        mapa_rochedos = ROCHEDO_CHECKPOINT.pack(len(prado['rochedos'])) + b''.join(
+            ROCHEDO_CHECKPOINT.pack(obter_valor_numerico(prado, rochedo)) for rochedo in prado['rochedos'])
+    else:
+        magic = MAGIC_CHECKPOINT
+        mapa_rochedos = bytearray((largura * obter_tamanho_y(prado) + 7) // 8)
+        for rochedo in prado['rochedos']:
+            valor = obter_valor_numerico(prado, rochedo)
+            mapa_rochedos[valor >> 3] |= 1 << (valor & 7)
+
+    ficheiro_temporario = nome_ficheiro + '.tmp'
+    with open(ficheiro_temporario, 'wb') as fp:
+        fp.write(CABECALHO_CHECKPOINT.pack(magic, origem, obter_pos_x(prado['limite']), obter_pos_y(prado['limite']),
+                                           nr_geracao, len(especies), len(registos)))
+
+        for especie, reproducao, alimentacao in especies:
+            nome = especie.encode('utf-8')
+            fp.write(ESPECIE_CHECKPOINT.pack(len(nome), reproducao, alimentacao) + nome)
+
+        fp.write(mapa_rochedos)
+        fp.write(b''.join(registos))
+
+    os.replace(ficheiro_temporario, nome_ficheiro)
+
+
+def eh_valor_interior(valor: int, limite_x: int, limite_y: int) -> bool:
+    """Verifica se o valor numérico corresponde a uma posição do prado fora das montanhas.
+
+    Args:
+        valor (int)
+        limite_x (int)
+        limite_y (int)
+
+    Returns:
+        bool: é interior?
+    """
+    y, x = divmod(valor, limite_x + 1)
+
+    return 0 < x < limite_x and 0 < y < limite_y
+
+
+def carregar_prado(nome_ficheiro: str, origem: bytes = None) -> tuple:
+    """Carrega um checkpoint binário criado por guardar_prado, lendo-o diretamente de memória mapeada (mmap).
+
+    Como o prado é criado sem passar por cria_prado, verifica-se aqui que o ficheiro descreve um prado válido:
+    espécies válidas e rochedos e animais dentro do prado, sem posições repetidas.
+
+    Args:
+        nome_ficheiro (str)
+        origem (bytes): se dado, resumo do ficheiro do prado de onde o checkpoint tem de ter partido
+
+    Raises:
+        ValueError: 'carregar_prado: ficheiro invalido'
+        ValueError: 'carregar_prado: checkpoint de outro prado'
+
+    Returns:
+        tuple: (prado, número da geração)
+    """
+    with open(nome_ficheiro, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as dados, \
+            memoryview(dados) as vista:
+        if len(dados) < CABECALHO_CHECKPOINT.size or dados[:4] not in (MAGIC_CHECKPOINT, MAGIC_CHECKPOINT_ESPARSO):
+            raise ValueError('carregar_prado: ficheiro invalido')
+        esparso = dados[:4] == MAGIC_CHECKPOINT_ESPARSO
+
+        _, origem_checkpoint, limite_x, limite_y, nr_geracao, nr_especies, nr_animais = \
+            CABECALHO_CHECKPOINT.unpack_from(dados, 0)
+        if origem is not None and origem != origem_checkpoint:
+            raise ValueError('carregar_prado: checkpoint de outro prado')
+
+        largura = limite_x + 1
+        inicio = CABECALHO_CHECKPOINT.size
+
+        especies = []
+        for _ in range(nr_especies):
+            if inicio + ESPECIE_CHECKPOINT.size > len(dados):
+                raise ValueError('carregar_prado: ficheiro invalido')
+            tamanho, reproducao, alimentacao = ESPECIE_CHECKPOINT.unpack_from(dados, inicio)
+            inicio += ESPECIE_CHECKPOINT.size
+            if tamanho == 0 or reproducao == 0 or inicio + tamanho > len(dados):
+                raise ValueError('carregar_prado: ficheiro invalido')
+
+            try:
+                especie = str(vista[inicio:inicio + tamanho], 'utf-8')
+            except UnicodeDecodeError as erro:
+                raise ValueError('carregar_prado: ficheiro invalido') from erro
+
+            especies.append(obter_id_especie(especie, reproducao, alimentacao))
+            inicio += tamanho
+
+        # valores numéricos de todas as posições ocupadas por rochedos e animais, para detetar repetições
+        ocupadas = set()
+
+        rochedos = []
+        if esparso:
+            if inicio + ROCHEDO_CHECKPOINT.size > len(dados):
+                raise ValueError('carregar_prado: ficheiro invalido')
+            nr_rochedos, = ROCHEDO_CHECKPOINT.unpack_from(dados, inicio)
+            inicio += ROCHEDO_CHECKPOINT.size
+            fim_rochedos = inicio + nr_rochedos * ROCHEDO_CHECKPOINT.size
+            if fim_rochedos > len(dados):
+                raise ValueError('carregar_prado: ficheiro invalido')
+
+            for valor, in ROCHEDO_CHECKPOINT.iter_unpack(vista[inicio:fim_rochedos]):
+                if not eh_valor_interior(valor, limite_x, limite_y) or valor in ocupadas:
+                    raise ValueError('carregar_prado: ficheiro invalido')
+                ocupadas.add(valor)
+                rochedos.append(cria_posicao(valor % largura, valor // largura))
+        else:
+            fim_rochedos = inicio + (largura * (limite_y + 1) + 7) // 8
+            for byte_rochedo in RE_BYTE_NAO_NULO.finditer(dados, inicio, fim_rochedos):
+                indice = byte_rochedo.start()
+                for bit in range(8):
+                    if dados[indice] >> bit & 1:
+                        valor = (indice - inicio) * 8 + bit
+                        if not eh_valor_interior(valor, limite_x, limite_y):
+                            raise ValueError('carregar_prado: ficheiro invalido')
+                        ocupadas.add(valor)
+                        rochedos.append(cria_posicao(valor % largura, valor // largura))
+
+        if len(dados) != fim_rochedos + nr_animais * ANIMAL_CHECKPOINT.size:
+            raise ValueError('carregar_prado: ficheiro invalido')
+
+        animais = []
+        posicoes = []
+        for valor, id_especie, idade, fome in ANIMAL_CHECKPOINT.iter_unpack(vista[fim_rochedos:]):
+            if id_especie >= nr_especies or not eh_valor_interior(valor, limite_x, limite_y) or valor in ocupadas:
+                raise ValueError('carregar_prado: ficheiro invalido')
+            ocupadas.add(valor)
+
+            animal = Animal(especies[id_especie])
+            animal.idade = idade
+            animal.fome = fome
+            animais.append(animal)
+            posicoes.append(cria_posicao(valor % largura, valor // largura))
+
+    return (construir_prado(cria_posicao(limite_x, limite_y), tuple(rochedos), tuple(animais), tuple(posicoes), esparso),
+            nr_geracao)
+
+
 def prado_para_str_com_estatisticas(prado, nr_predadores, nr_presas, nr_geracao):
     """Transforma os dados do prado numa string
 
@@ -1111,61 +2197,557 @@ def prado_para_str_com_estatisticas(prado, nr_predadores, nr_presas, nr_geracao)
     return estatisticas + "\n" + prado_para_str(prado)
 
 
-def simula_ecossistema(nome_ficheiro: str, nr_geracoes_a_simular: int, verboso: bool) -> tuple:
+def obter_estado_prado(prado: dict) -> tuple:
+    """Devolve um tuplo (comparável e com hash) que identifica o estado do prado para efeitos da sua evolução.
+    A idade de cada animal é limitada à sua frequência de reprodução: um animal fértil comporta-se da mesma forma
+    qualquer que seja a idade que já ultrapassou.
+
+    Args:
+        prado (dict)
+
+    Returns:
+        tuple: estado
+    """
+    estado = []
+
+    for posicao in obter_posicao_animais(prado):
+        animal = obter_animal(prado, posicao)
+        reproducao = obter_freq_reproducao(animal)
+        estado.append((obter_valor_numerico(prado, posicao), obter_especie(animal), reproducao,
+                       obter_freq_alimentacao(animal), min(obter_idade(animal), reproducao), obter_fome(animal)))
+
+    return tuple(estado)
+
+
+MAGIC_ESTATISTICAS = b'EST1'
+COLUNAS_ESTATISTICAS = ('geracao', 'predadores', 'presas', 'nascimentos', 'mortes_predacao', 'mortes_fome')
+LINHAS_BLOCO_ESTATISTICAS = 4096
+NR_COLUNAS_ESTATISTICAS = struct.Struct('<I')  # nº de colunas (seguido de cada nome: tamanho <H e nome em utf-8)
+TAMANHO_NOME_ESTATISTICAS = struct.Struct('<H')
+BLOCO_ESTATISTICAS = struct.Struct('<I')  # nº de linhas do bloco (seguido de cada coluna: nº de linhas x <Q)
+
+
+def abrir_estatisticas(nome_ficheiro: str, especies: tuple, formato: str = 'csv', geracao_inicial: int = 0) -> dict:
+    """Cria o ficheiro de estatísticas por geração e devolve o escritor usado por escrever_estatisticas.
+
+    Em formato 'csv' cada geração é uma linha de texto. Em formato 'binario' o ficheiro tem o cabeçalho
+    MAGIC_ESTATISTICAS e os nomes das colunas, seguidos de blocos de até LINHAS_BLOCO_ESTATISTICAS gerações,
+    cada um com os valores de uma coluna seguidos (inteiros de 64 bits sem sinal, little-endian).
+
+    Numa simulação retomada (geracao_inicial > 0), se o ficheiro já existir, são mantidos os registos até à
+    geracao_inicial (inclusive) e descartados os posteriores, escritos depois do checkpoint de onde se retoma.
+
+    Args:
+        nome_ficheiro (str)
+        especies (tuple): espécies com uma coluna de contagem (as espécies só podem desaparecer do prado)
+        formato (str): 'csv' ou 'binario'
+        geracao_inicial (int): geração de onde a simulação parte
+
+    Raises:
+        ValueError: 'abrir_estatisticas: argumentos invalidos'
+
+    Returns:
+        dict: escritor
+    """
+    if formato not in ('csv', 'binario'):
+        raise ValueError('abrir_estatisticas: argumentos invalidos')
+
+    anteriores = None
+    if geracao_inicial > 0 and os.path.exists(nome_ficheiro):
+        anteriores = ler_estatisticas(nome_ficheiro)
+
+        # as colunas das espécies vêm do ficheiro, que pode ter espécies entretanto desaparecidas do prado
+        colunas = tuple(anteriores)
+        if colunas[:len(COLUNAS_ESTATISTICAS)] != COLUNAS_ESTATISTICAS or \
+                not set(especies) <= set(colunas[len(COLUNAS_ESTATISTICAS):]):
+            raise ValueError('abrir_estatisticas: argumentos invalidos')
+        especies = colunas[len(COLUNAS_ESTATISTICAS):]
+
+    colunas = COLUNAS_ESTATISTICAS + tuple(especies)
+
+    if formato == 'csv':
+        ficheiro = open(nome_ficheiro, 'w', newline='', buffering=1 << 16)
+        csv.writer(ficheiro).writerow(colunas)
+    else:
+        ficheiro = open(nome_ficheiro, 'wb', buffering=1 << 16)
+        ficheiro.write(MAGIC_ESTATISTICAS + NR_COLUNAS_ESTATISTICAS.pack(len(colunas)))
+        for coluna in colunas:
+            nome = coluna.encode('utf-8')
+            ficheiro.write(TAMANHO_NOME_ESTATISTICAS.pack(len(nome)) + nome)
+
+    escritor = {'ficheiro': ficheiro, 'formato': formato, 'especies': tuple(especies),
+                'valores': [array('Q') for _ in colunas], 'eventos': None, 'ultima_geracao': -1}
+
+    if anteriores is not None:
+        for registo in zip(*anteriores.values()):
+            if registo[0] <= geracao_inicial:
+                escrever_registo(escritor, registo)
+                escritor['ultima_geracao'] = registo[0]
+
+    return escritor
+
+
+def escrever_estatisticas(escritor: dict, prado: dict, nr_geracao: int) -> None:
+    """Acrescenta ao ficheiro de estatísticas o registo da geração: população e nascimentos/mortes desde o
+    registo anterior (zero no primeiro registo). Se o ficheiro já tiver o registo da geração (numa simulação
+    retomada), apenas é atualizada a referência para os nascimentos/mortes do registo seguinte.
+
+    Args:
+        escritor (dict): devolvido por abrir_estatisticas
+        prado (dict)
+        nr_geracao (int)
+    """
+    eventos = obter_eventos(prado)
+    anteriores = escritor['eventos'] or eventos
+    escritor['eventos'] = eventos
+
+    if nr_geracao <= escritor['ultima_geracao']:
+        return
+
+    especies = prado['populacao']['especies']
+    escrever_registo(escritor, (nr_geracao, obter_numero_predadores(prado), obter_numero_presas(prado),
+                                *(atual - anterior for atual, anterior in zip(eventos, anteriores)),
+                                *(especies.get(especie, 0) for especie in escritor['especies'])))
+
+
+def escrever_registo(escritor: dict, registo: tuple) -> None:
+    """Acrescenta ao ficheiro de estatísticas um registo com o valor de cada coluna.
+
+    Args:
+        escritor (dict)
+        registo (tuple)
+    """
+    if escritor['formato'] == 'csv':
+        escritor['ficheiro'].write(','.join(map(str, registo)) + '\n')
+        return
+
+    for valores, valor in zip(escritor['valores'], registo):
+        valores.append(valor)
+
+    if len(escritor['valores'][0]) == LINHAS_BLOCO_ESTATISTICAS:
+        escrever_bloco_estatisticas(escritor)
+
+
+def escrever_bloco_estatisticas(escritor: dict) -> None:
+    """Escreve no ficheiro binário as gerações acumuladas no escritor, coluna a coluna, e esvazia-o.
+
+    Args:
+        escritor (dict)
+    """
+    ficheiro = escritor['ficheiro']
+    ficheiro.write(BLOCO_ESTATISTICAS.pack(len(escritor['valores'][0])))
+
+    for valores in escritor['valores']:
+        if sys.byteorder != 'little':
+            valores.byteswap()
+        valores.tofile(ficheiro)
+        del valores[:]
+
+
+def fechar_estatisticas(escritor: dict) -> None:
+    """Escreve as gerações pendentes e fecha o ficheiro de estatísticas.
+
+    Args:
+        escritor (dict)
+    """
+    if escritor['formato'] == 'binario' and len(escritor['valores'][0]):
+        escrever_bloco_estatisticas(escritor)
+
+    escritor['ficheiro'].close()
+
+
+@contextmanager
+def estatisticas(nome_ficheiro: str, especies: tuple, formato: str = 'csv', geracao_inicial: int = 0):
+    """Versão de abrir_estatisticas para usar num bloco with: o ficheiro é sempre fechado à saída do bloco (com
+    fechar_estatisticas, que escreve as gerações pendentes), mesmo que a simulação termine com uma exceção.
+
+    Args:
+        nome_ficheiro (str)
+        especies (tuple)
+        formato (str): 'csv' ou 'binario'
+        geracao_inicial (int)
+
+    Yields:
+        dict: escritor
+    """
+    escritor = abrir_estatisticas(nome_ficheiro, especies, formato, geracao_inicial)
+    try:
+        yield escritor
+    finally:
+        fechar_estatisticas(escritor)
+
+
+def ler_estatisticas(nome_ficheiro: str) -> dict:
+    """Lê um ficheiro de estatísticas (csv ou binário) escrito por simula_ecossistema.
+
+    Args:
+        nome_ficheiro (str)
+
+    Returns:
+        dict: nome da coluna -> lista com o valor de cada geração
+    """
+    with open(nome_ficheiro, 'rb') as ficheiro:
+        dados = ficheiro.read()
+
+    if not dados.startswith(MAGIC_ESTATISTICAS):
+        linhas = list(csv.reader(dados.decode('utf-8').splitlines()))
+        return {coluna: [int(linha[i]) for linha in linhas[1:]] for i, coluna in enumerate(linhas[0])}
+
+    inicio = len(MAGIC_ESTATISTICAS)
+    nr_colunas, = NR_COLUNAS_ESTATISTICAS.unpack_from(dados, inicio)
+    inicio += NR_COLUNAS_ESTATISTICAS.size
+
+    colunas = []
+    for _ in range(nr_colunas):
+        tamanho, = TAMANHO_NOME_ESTATISTICAS.unpack_from(dados, inicio)
+        inicio += TAMANHO_NOME_ESTATISTICAS.size
+        colunas.append(dados[inicio:inicio + tamanho].decode('utf-8'))
+        inicio += tamanho
+
+    valores = [array('Q') for _ in colunas]
+    while inicio < len(dados):
+        nr_linhas, = BLOCO_ESTATISTICAS.unpack_from(dados, inicio)
+        inicio += BLOCO_ESTATISTICAS.size
+
+        for coluna in valores:
+            bloco = array('Q', dados[inicio:inicio + 8 * nr_linhas])
+            if sys.byteorder != 'little':
+                bloco.byteswap()
+            coluna.extend(bloco)
+            inicio += 8 * nr_linhas
+
+    return {coluna: coluna_valores.tolist() for coluna, coluna_valores in zip(colunas, valores)}
+
+
+def simula_ecossistema(nome_ficheiro: str, nr_geracoes_a_simular: int, verboso: bool, ficheiro_checkpoint: str = None,
+                       intervalo_checkpoint: int = 0, imprimir: bool = True, detetar_ciclos: bool = False,
+                       instrumentar: bool = False, ficheiro_estatisticas: str = None,
+                       formato_estatisticas: str = 'csv', esparso: bool = False) -> tuple:
     """É a função principal que permite simular o ecossistema de um prado.
      A função recebe uma cadeia de caracteres, um valor inteiro e um valor booleano e devolve o tuplo de dois elementos correspondentes ao número de predadores e 
      presas no prado no fim da simulação. 
 
 
+    Se for dado um ficheiro_checkpoint, o prado é guardado nele a cada intervalo_checkpoint gerações e, se o
+    ficheiro já existir, a simulação é retomada a partir desse checkpoint em vez de começar do ficheiro do prado
+    (o checkpoint tem de ter sido criado a partir do mesmo ficheiro do prado; ver carregar_prado). Um checkpoint de
+    uma geração posterior a nr_geracoes_a_simular é ignorado.
+
+    Se for dado um ficheiro_estatisticas, é escrito nele um registo por geração (predadores, presas, nascimentos,
+    mortes por predação e por fome, e o número de animais de cada espécie). Neste caso o prado nunca é impresso:
+    o ficheiro é a única saída da simulação. Quando a simulação é retomada de um checkpoint, são mantidos os
+    registos que o ficheiro já tinha até à geração do checkpoint.
+
     Args:
         nome_ficheiro (str): [description]
         nr_geracoes_a_simular (int): [description]
         verboso (bool): [description]
+        ficheiro_checkpoint (str): checkpoint binário a retomar/atualizar (opcional)
+        intervalo_checkpoint (int): de quantas em quantas gerações guardar o checkpoint (0 para nunca)
+        imprimir (bool): se False, o prado nunca é impresso (ignorado se for dado um ficheiro_estatisticas)
+        detetar_ciclos (bool): se True, quando o prado volta a um estado anterior salta diretamente para a última
+            geração (ignorado no modo verboso com impressão, que tem de mostrar as gerações intermédias)
+        instrumentar (bool): se True, mede o tempo de cada fase e escreve o resumo no stderr no fim
+        ficheiro_estatisticas (str): ficheiro onde escrever as estatísticas de cada geração (opcional; a deteção
+            de ciclos é ignorada, porque todas as gerações têm de ser registadas)
+        formato_estatisticas (str): 'csv' ou 'binario' (ver abrir_estatisticas)
+        esparso (bool): se True, o prado é guardado em blocos esparsos (ver cria_prado)
 
     Returns:
         tuple: [description]
     """
-    prado = None
+    if instrumentar:
+        ativar_instrumentacao()
+        try:
+            return simula_ecossistema(nome_ficheiro, nr_geracoes_a_simular, verboso, ficheiro_checkpoint,
+                                      intervalo_checkpoint, imprimir, detetar_ciclos, False, ficheiro_estatisticas,
+                                      formato_estatisticas, esparso)
+        finally:
+            print(resumo_instrumentacao(desativar_instrumentacao()), file=sys.stderr)
 
-    with open(nome_ficheiro, 'r') as fp:
-        dimensoes = eval(fp.readline())
-        obstaculos = eval(fp.readline())
-        animais_e_posicoes_raw = map(eval, fp.readlines())
+    geracao_inicial = 0
 
-        animais = []
-        posicoes = []
+    if ficheiro_checkpoint is not None:
+        origem = obter_resumo_ficheiro(nome_ficheiro)
 
-        for i in animais_e_posicoes_raw:
-            animal_raw = i[:-1]
-            animais.append(cria_animal(animal_raw[0], animal_raw[1], animal_raw[2]))
+    prado = None
+    if ficheiro_checkpoint is not None and os.path.exists(ficheiro_checkpoint):
+        prado, geracao_inicial = carregar_prado(ficheiro_checkpoint, origem)
 
-            posicao_raw = i[-1]
-            posicoes.append(cria_posicao(posicao_raw[0], posicao_raw[1]))
+        # um checkpoint de uma geração posterior à pedida não serve: a simulação recomeça do ficheiro do prado
+        if geracao_inicial > nr_geracoes_a_simular:
+            prado, geracao_inicial = None, 0
 
-        prado = cria_prado(dimensoes, obstaculos, tuple(animais), tuple(posicoes))
+    if prado is None:
+        prado = ler_prado(nome_ficheiro, esparso)
+
+    if ficheiro_estatisticas is not None:
+        imprimir = False
+        escritor_estatisticas = estatisticas(ficheiro_estatisticas, tuple(sorted(obter_populacao_especies(prado))),
+                                             formato_estatisticas, geracao_inicial)
+    else:
+        escritor_estatisticas = nullcontext()
 
     nr_predadores = obter_numero_predadores(prado)
     nr_presas = obter_numero_presas(prado)
-    print(prado_para_str_com_estatisticas(prado, nr_predadores, nr_presas, 0))
+    if imprimir:
+        print(prado_para_str_com_estatisticas(prado, nr_predadores, nr_presas, geracao_inicial))
 
-    for g in range(nr_geracoes_a_simular):
-        nr_predadores_old = nr_predadores
-        nr_presas_old = nr_presas
+    with escritor_estatisticas as escritor:
+        if escritor is not None:
+            escrever_estatisticas(escritor, prado, geracao_inicial)
 
-        prado = geracao(prado)
+        # deteção de ciclos (algoritmo de Brent): cada estado é comparado com o estado guardado na "tartaruga",
+        # que passa para o estado atual sempre que a distância entre os dois chega à potência de 2 seguinte
+        detetar_ciclos = detetar_ciclos and not (imprimir and verboso) and escritor is None
+        if detetar_ciclos:
+            tartaruga = obter_estado_prado(prado)
+            hash_tartaruga = hash(tartaruga)
+            geracao_tartaruga = geracao_inicial
+            potencia = 1
 
-        nr_predadores = (prado)
-        nr_presas = obter_numero_presas(prado)
+        g = geracao_inicial
 
-        if verboso:
-            houve_diff_predadores = nr_predadores_old != nr_predadores
-            houve_diff_presas = nr_presas != nr_presas_old
+        while g < nr_geracoes_a_simular:
+            nr_predadores_old = nr_predadores
+            nr_presas_old = nr_presas
 
-            if houve_diff_predadores or houve_diff_presas:
-                print(prado_para_str_com_estatisticas(prado, nr_predadores, nr_presas, g + 1))
-        else:
-            if g == nr_geracoes_a_simular - 1:  # se for a ultima geracao...
-                print(prado_para_str_com_estatisticas(prado, nr_predadores, nr_presas, g + 1))
+            prado = geracao(prado)
+            g += 1
+
+            nr_predadores = obter_numero_predadores(prado)
+            nr_presas = obter_numero_presas(prado)
+
+            if escritor is not None:
+                escrever_estatisticas(escritor, prado, g)
+
+            if imprimir and verboso:
+                houve_diff_predadores = nr_predadores_old != nr_predadores
+                houve_diff_presas = nr_presas != nr_presas_old
+
+                if houve_diff_predadores or houve_diff_presas:
+                    print(prado_para_str_com_estatisticas(prado, nr_predadores, nr_presas, g))
+
+            if ficheiro_checkpoint is not None and intervalo_checkpoint > 0 and g % intervalo_checkpoint == 0:
+                guardar_prado(prado, ficheiro_checkpoint, g, origem)
+
+            if detetar_ciclos:
+                estado = obter_estado_prado(prado)
+                hash_estado = hash(estado)
+
+                if hash_estado == hash_tartaruga and estado == tartaruga:
+                    # o prado repete-se a cada periodo gerações: saltam-se todos os ciclos completos que faltam
+                    periodo = g - geracao_tartaruga
+                    g += (nr_geracoes_a_simular - g) // periodo * periodo
+                    detetar_ciclos = False
+                elif g - geracao_tartaruga == potencia:
+                    tartaruga, hash_tartaruga, geracao_tartaruga = estado, hash_estado, g
+                    potencia *= 2
+
+    if imprimir and not verboso and nr_geracoes_a_simular > geracao_inicial:  # a ultima geracao
+        print(prado_para_str_com_estatisticas(prado, nr_predadores, nr_presas, nr_geracoes_a_simular))
+
+    return (obter_numero_predadores(prado), obter_numero_presas(prado))
+
+
+def iterar_geracoes(prado: dict, nr_geracoes: int = None, intervalo: int = 1, incluir_prado: bool = False,
+                    geracao_inicial: int = 0):
+    """Avança o prado geração a geração (destrutivamente), produzindo uma vista do estado a cada intervalo gerações,
+    a começar pelo estado inicial. As gerações só são simuladas à medida que as vistas são pedidas, pelo que o
+    chamador pode parar a qualquer momento.
+
+    A vista inclui o próprio prado (e não uma cópia) se incluir_prado for True: o prado continua a ser alterado
+    pelas gerações seguintes.
+
+    Args:
+        prado (dict)
+        nr_geracoes (int): número de gerações a simular (None para nunca parar)
+        intervalo (int): de quantas em quantas gerações produzir uma vista
+        incluir_prado (bool)
+        geracao_inicial (int): número da geração em que o prado está
+
+    Raises:
+        ValueError: 'iterar_geracoes: argumentos invalidos'
+
+    Yields:
+        dict: {'geracao', 'predadores', 'presas', 'especies'} e, se pedido, 'prado'
+    """
+    if not (type(intervalo) == int and intervalo > 0) or not (nr_geracoes is None or type(nr_geracoes) == int):
+        raise ValueError('iterar_geracoes: argumentos invalidos')
+
+    g = geracao_inicial
+    geracao_final = None if nr_geracoes is None else geracao_inicial + nr_geracoes
+
+    while True:
+        if (g - geracao_inicial) % intervalo == 0:
+            vista = {'geracao': g, 'predadores': obter_numero_predadores(prado), 'presas': obter_numero_presas(prado),
+                     'especies': obter_populacao_especies(prado)}
+            if incluir_prado:
+                vista['prado'] = prado
+            yield vista
+
+        if g == geracao_final:
+            return
+
+        geracao(prado)
+        g += 1
+
+
+def simula_geracoes(nome_ficheiro: str, nr_geracoes: int = None, intervalo: int = 1, incluir_prado: bool = False):
+    """Versão preguiçosa de simula_ecossistema: lê o prado do ficheiro (apenas quando a primeira vista é pedida) e
+    produz as vistas de iterar_geracoes, sem imprimir nada.
+
+    Args:
+        nome_ficheiro (str)
+        nr_geracoes (int): número de gerações a simular (None para nunca parar)
+        intervalo (int): de quantas em quantas gerações produzir uma vista
+        incluir_prado (bool)
+
+    Yields:
+        dict: vista de cada geração (ver iterar_geracoes)
+    """
+    yield from iterar_geracoes(ler_prado(nome_ficheiro), nr_geracoes, intervalo, incluir_prado)
+
+
+def simula_ecossistema_cronometrada(nome_ficheiro: str, nr_geracoes_a_simular: int) -> tuple:
+    """Simula o ecossistema do ficheiro sem imprimir o prado, medindo o tempo real da simulação.
+
+    Args:
+        nome_ficheiro (str)
+        nr_geracoes_a_simular (int)
+
+    Returns:
+        tuple: (nome do ficheiro, (predadores, presas), segundos)
+    """
+    inicio = time.perf_counter()
+    resultado = simula_ecossistema(nome_ficheiro, nr_geracoes_a_simular, False, imprimir=False)
+
+    return nome_ficheiro, resultado, time.perf_counter() - inicio
+
+
+def simula_ecossistemas(ficheiros, nr_geracoes_a_simular, nr_processos: int = None):
+    """Simula vários ficheiros de prados em paralelo, num conjunto de processos, sem imprimir os prados.
+    Os resultados são produzidos à medida que cada simulação termina; se o chamador deixar de os pedir (fechando o
+    gerador), as simulações que ainda não começaram são canceladas.
+
+    Args:
+        ficheiros: padrão glob (str) ou lista de ficheiros/padrões glob
+        nr_geracoes_a_simular: número de gerações (int), igual para todos, ou lista com um valor por ficheiro
+        nr_processos (int): número de processos (por omissão, um por core)
+
+    Raises:
+        ValueError: 'simula_ecossistemas: argumentos invalidos'
+
+    Yields:
+        tuple: (nome do ficheiro, (predadores, presas), segundos)
+    """
+    if isinstance(ficheiros, str):
+        ficheiros = [ficheiros]
+
+    nomes = []
+    for padrao in ficheiros:
+        nomes += sorted(glob.glob(padrao)) if any(caracter in padrao for caracter in '*?[') else [padrao]
+
+    if isinstance(nr_geracoes_a_simular, int):
+        nr_geracoes_a_simular = [nr_geracoes_a_simular] * len(nomes)
+
+    if len(nr_geracoes_a_simular) != len(nomes):
+        raise ValueError('simula_ecossistemas: argumentos invalidos')
+
+    executor = ProcessPoolExecutor(max_workers=nr_processos)
+    try:
+        futuros = [executor.submit(simula_ecossistema_cronometrada, nome, nr_geracoes)
+                   for nome, nr_geracoes in zip(nomes, nr_geracoes_a_simular)]
+
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+    finally:
+        # sem esperar pelas simulações pendentes, que deixam de ser precisas se o gerador for fechado antes do fim
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def simula_populacao(nome_ficheiro: str, parametros: dict, nr_geracoes_a_simular: int) -> tuple:
+    """Simula o prado do ficheiro com as frequências de algumas espécies substituídas, sem imprimir nada.
+
+    Args:
+        nome_ficheiro (str)
+        parametros (dict): especie -> {'reproducao': r, 'alimentacao': a} (cada campo é opcional)
+        nr_geracoes_a_simular (int)
+
+    Returns:
+        tuple: tuplo com o par (predadores, presas) de cada geração, começando na geração 0
+    """
+    prado = ler_prado(nome_ficheiro)
+
+    for posicao in obter_posicao_animais(prado):
+        animal = obter_animal(prado, posicao)
+        especie = obter_especie(animal)
+
+        if especie in parametros:
+            novo = cria_animal_compacto(especie,
+                                        parametros[especie].get('reproducao', obter_freq_reproducao(animal)),
+                                        parametros[especie].get('alimentacao', obter_freq_alimentacao(animal)))
+            novo['idade'] = obter_idade(animal)
+            novo['fome'] = obter_fome(animal)
+            inserir_animal(prado, novo, posicao)
+
+    return tuple((vista['predadores'], vista['presas']) for vista in iterar_geracoes(prado, nr_geracoes_a_simular))
+
+
+def varrimento_parametros(nome_ficheiro: str, grelha_parametros: dict, nr_geracoes_a_simular: int,
+                          pasta_cache: str = None, nr_processos: int = None) -> list:
+    """Simula o prado do ficheiro para todas as combinações das frequências dadas, em paralelo.
+    Com uma pasta_cache, cada ponto fica guardado em disco, identificado pelo hash do conteúdo do prado, dos
+    parâmetros e do número de gerações, e os pontos já calculados não voltam a ser simulados.
+
+    Args:
+        nome_ficheiro (str): prado base
+        grelha_parametros (dict): especie -> {'reproducao': [valores], 'alimentacao': [valores]}
+        nr_geracoes_a_simular (int)
+        pasta_cache (str): pasta onde guardar os resultados (opcional)
+        nr_processos (int): número de processos (por omissão, um por core)
+
+    Returns:
+        list: uma linha por combinação, {'parametros', 'predadores', 'presas', 'populacao'}, pela ordem da grelha
+    """
+    with open(nome_ficheiro, 'rb') as fp:
+        hash_prado = hashlib.sha256(fp.read()).hexdigest()
+
+    eixos = [(especie, campo) for especie in sorted(grelha_parametros) for campo in sorted(grelha_parametros[especie])]
+    combinacoes = []
+
+    for valores in itertools.product(*(grelha_parametros[especie][campo] for especie, campo in eixos)):
+        parametros = {}
+        for (especie, campo), valor in zip(eixos, valores):
+            parametros.setdefault(especie, {})[campo] = valor
+        combinacoes.append(parametros)
+
+    populacoes = [None] * len(combinacoes)
+    ficheiros_cache = [None] * len(combinacoes)
+
+    if pasta_cache is not None:
+        os.makedirs(pasta_cache, exist_ok=True)
+
+        for i, parametros in enumerate(combinacoes):
+            chave = json.dumps([hash_prado, parametros, nr_geracoes_a_simular], sort_keys=True)
+            ficheiros_cache[i] = os.path.join(pasta_cache, hashlib.sha256(chave.encode()).hexdigest() + '.json')
+
+            if os.path.exists(ficheiros_cache[i]):
+                with open(ficheiros_cache[i], 'r') as fp:
+                    populacoes[i] = tuple(map(tuple, json.load(fp)))
+
+    with ProcessPoolExecutor(max_workers=nr_processos) as executor:
+        futuros = {executor.submit(simula_populacao, nome_ficheiro, combinacoes[i], nr_geracoes_a_simular): i
+                   for i in range(len(combinacoes)) if populacoes[i] is None}
+
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            populacoes[i] = futuro.result()
 
-    return ((prado), obter_numero_presas(prado))
+            if ficheiros_cache[i] is not None:
+                with open(ficheiros_cache[i] + '.tmp', 'w') as fp:
+                    json.dump(populacoes[i], fp)
+                os.replace(ficheiros_cache[i] + '.tmp', ficheiros_cache[i])
 
+    return [{'parametros': parametros, 'predadores': populacao[-1][0], 'presas': populacao[-1][1], 'populacao': populacao}
+            for parametros, populacao in zip(combinacoes, populacoes)]
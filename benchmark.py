@@ -0,0 +1,300 @@
+"""Benchmarks das operações principais do prado (criação, validação, leitura do ficheiro, geração, movimento e
+representação), em prados gerados de 10x10 até 1000x1000 com misturas esparsas e densas de animais.
+
+Uso:
+    python benchmark.py --saida resultados.json
+    python benchmark.py --tamanhos 10 100 --comparar baseline.json --tolerancia 0.25
+
+Para cada operação é guardado o tempo (em segundos, por chamada ou por geração: o mínimo de várias amostras), o
+ruído das amostras e o pico de memória alocada (medido numa execução à parte com tracemalloc, para não afetar os
+tempos). Na comparação, a tolerância de cada tempo é alargada pelo ruído medido.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import statistics
+import time
+import timeit
+import tracemalloc
+
+from Projeto2Final import (cria_animal_compacto, cria_copia_prado, cria_posicao, cria_prado, eh_prado, geracao,
+                           ler_prado, obter_movimento, obter_posicao_animais, prado_para_str)
+
+
+TAMANHOS = (10, 100, 1000)
+# fração das células livres ocupadas por animais
+DENSIDADES = {'esparso': 0.05, 'denso': 0.6}
+FRACAO_ROCHEDOS = 0.05
+FRACAO_PREDADORES = 0.3
+AMOSTRAS = 5
+ESPECIES_PRESA = (('rabbit', 5, 0), ('sheep', 7, 0))
+ESPECIES_PREDADOR = (('fox', 10, 8), ('lynx', 20, 15))
+
+
+def gerar_cenario(tamanho: int, densidade: float, semente: int = 0) -> tuple:
+    """Gera, de forma determinística, os argumentos de cria_prado para um prado tamanho x tamanho.
+
+    Args:
+        tamanho (int): número de células de cada lado (incluindo as montanhas)
+        densidade (float): fração das células livres ocupadas por animais
+        semente (int)
+
+    Returns:
+        tuple: (dimensão, rochedos, especies dos animais, posições)
+    """
+    gerador = random.Random(semente)
+    celulas = [(x, y) for y in range(1, tamanho - 1) for x in range(1, tamanho - 1)]
+    gerador.shuffle(celulas)
+
+    nr_rochedos = int(len(celulas) * FRACAO_ROCHEDOS)
+    nr_animais = max(1, int((len(celulas) - nr_rochedos) * densidade))
+
+    especies = [gerador.choice(ESPECIES_PREDADOR if gerador.random() < FRACAO_PREDADORES else ESPECIES_PRESA)
+                for _ in range(nr_animais)]
+
+    return ((tamanho - 1, tamanho - 1), tuple(celulas[:nr_rochedos]), tuple(especies),
+            tuple(celulas[nr_rochedos:nr_rochedos + nr_animais]))
+
+
+def criar_prado_cenario(cenario: tuple) -> dict:
+    """Cria o prado de um cenário gerado por gerar_cenario.
+
+    Args:
+        cenario (tuple)
+
+    Returns:
+        dict: prado
+    """
+    dimensao, rochedos, especies, posicoes = cenario
+    animais = tuple(cria_animal_compacto(*especie) for especie in especies)
+
+    return cria_prado(cria_posicao(*dimensao), tuple(cria_posicao(*r) for r in rochedos), animais,
+                      tuple(cria_posicao(*p) for p in posicoes))
+
+
+def escrever_cenario(cenario: tuple, nome_ficheiro: str) -> None:
+    """Escreve um cenário no formato de ficheiro lido por simula_ecossistema.
+
+    Args:
+        cenario (tuple)
+        nome_ficheiro (str)
+    """
+    dimensao, rochedos, especies, posicoes = cenario
+
+    with open(nome_ficheiro, 'w') as fp:
+        fp.write(repr(dimensao) + '\n' + repr(rochedos) + '\n')
+        fp.writelines(repr(especie + (posicao,)) + '\n' for especie, posicao in zip(especies, posicoes))
+
+
+def medir(operacao, preparar=None, repeticoes: int = 1, amostras: int = AMOSTRAS) -> dict:
+    """Mede o tempo por repetição (o mínimo de várias amostras, o menos afetado por outros processos), o ruído das
+    amostras e o pico de memória de uma operação.
+
+    Sem preparar, a operação não altera o seu argumento e é repetida as vezes necessárias (timeit) para que cada
+    amostra dure pelo menos 0.2 segundos (a memória é medida numa só chamada). Com preparar, cada amostra parte de
+    um novo argumento e faz repeticoes chamadas.
+
+    Args:
+        operacao: função a medir, chamada com o valor devolvido por preparar (ou com None)
+        preparar: função chamada (fora da medição) antes de cada amostra e da medição da memória
+        repeticoes (int)
+        amostras (int)
+
+    Returns:
+        dict: {'segundos', 'ruido', 'pico_memoria'}, em que ruido é (mediana - mínimo) / mínimo das amostras
+    """
+    if preparar is None:
+        temporizador = timeit.Timer(lambda: operacao(None))
+        numero, _ = temporizador.autorange()
+        tempos = [tempo / numero for tempo in temporizador.repeat(amostras, numero)]
+        argumento = None
+    else:
+        tempos = []
+        for _ in range(amostras):
+            argumento = preparar()
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                operacao(argumento)
+            tempos.append((time.perf_counter() - inicio) / repeticoes)
+        argumento = preparar()
+
+    tracemalloc.start()
+    for _ in range(repeticoes):
+        operacao(argumento)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    segundos = min(tempos)
+    return {'segundos': segundos, 'ruido': (statistics.median(tempos) - segundos) / segundos if segundos else 0.0,
+            'pico_memoria': pico}
+
+
+def preparar_representacao_incremental(prado: dict) -> dict:
+    """Devolve uma cópia do prado já representada uma vez e depois avançada uma geração.
+
+    Args:
+        prado (dict)
+
+    Returns:
+        dict: cópia
+    """
+    copia = cria_copia_prado(prado)
+    prado_para_str(copia)
+
+    return geracao(copia)
+
+
+def executar(tamanhos: tuple = TAMANHOS, nr_geracoes: int = 3, semente: int = 0, amostras: int = AMOSTRAS) -> dict:
+    """Executa todos os benchmarks e devolve os resultados, identificados por 'operacao/tamanho/densidade'.
+
+    Args:
+        tamanhos (tuple): lados dos prados a gerar
+        nr_geracoes (int): número de gerações medidas por prado
+        semente (int)
+        amostras (int): número de amostras de cada tempo (ver medir)
+
+    Returns:
+        dict: resultados
+    """
+    resultados = {}
+
+    for tamanho in tamanhos:
+        for nome_densidade, densidade in DENSIDADES.items():
+            cenario = gerar_cenario(tamanho, densidade, semente)
+            sufixo = f'/{tamanho}x{tamanho}/{nome_densidade}'
+
+            resultados['cria_prado' + sufixo] = medir(lambda _: criar_prado_cenario(cenario), amostras=amostras)
+            prado = criar_prado_cenario(cenario)
+            resultados['eh_prado' + sufixo] = medir(lambda _: eh_prado(prado), amostras=amostras)
+
+            with tempfile.TemporaryDirectory() as pasta:
+                nome_ficheiro = os.path.join(pasta, 'prado.txt')
+                escrever_cenario(cenario, nome_ficheiro)
+                resultados['ler_prado' + sufixo] = medir(lambda _: ler_prado(nome_ficheiro), amostras=amostras)
+
+            posicoes = obter_posicao_animais(prado)
+            medicao = medir(lambda _: [obter_movimento(prado, posicao) for posicao in posicoes], amostras=amostras)
+            medicao['segundos'] /= len(posicoes)
+            resultados['obter_movimento' + sufixo] = medicao
+
+            # cada medição parte de uma cópia do mesmo prado, para que ambas simulem as mesmas gerações
+            resultados['geracao' + sufixo] = medir(geracao, lambda: cria_copia_prado(prado), nr_geracoes, amostras)
+
+            # representação de um prado novo (todas as linhas por construir) e depois de uma geração
+            resultados['prado_para_str' + sufixo] = medir(prado_para_str, lambda: criar_prado_cenario(cenario),
+                                                          amostras=amostras)
+            resultados['prado_para_str_incremental' + sufixo] = medir(
+                prado_para_str, lambda: preparar_representacao_incremental(prado), amostras=amostras)
+
+            print(f'{tamanho}x{tamanho} {nome_densidade}: ' + ', '.join(
+                f"{chave.split('/')[0]} {valor['segundos']:.6f}s" for chave, valor in resultados.items()
+                if chave.endswith(sufixo)), file=sys.stderr)
+
+    return {'python': platform.python_version(), 'nr_geracoes': nr_geracoes, 'semente': semente,
+            'amostras': amostras, 'resultados': resultados}
+
+
+def comparar(atual: dict, referencia: dict, tolerancia: float) -> list:
+    """Compara dois conjuntos de resultados e devolve as regressões (operações mais lentas ou com mais memória
+    do que a referência, para além da tolerância). Nos tempos, a tolerância é alargada em duas vezes o maior dos
+    ruídos medidos nas duas execuções, para que a variação normal entre execuções não conte como regressão.
+
+    Args:
+        atual (dict)
+        referencia (dict)
+        tolerancia (float): aumento relativo aceite (0.2 = 20%)
+
+    Returns:
+        list: (operação, métrica, valor de referência, valor atual)
+    """
+    regressoes = []
+
+    for chave, medicao in atual['resultados'].items():
+        if chave not in referencia['resultados']:
+            continue
+
+        medicao_referencia = referencia['resultados'][chave]
+        ruido = max(medicao.get('ruido', 0.0), medicao_referencia.get('ruido', 0.0))
+
+        for metrica, limite in (('segundos', 1 + tolerancia + 2 * ruido), ('pico_memoria', 1 + tolerancia)):
+            if medicao[metrica] > medicao_referencia[metrica] * limite:
+                regressoes.append((chave, metrica, medicao_referencia[metrica], medicao[metrica]))
+
+    return regressoes
+
+
+def juntar_resultados(resultados: dict, novos: dict) -> dict:
+    """Junta aos resultados as medições repetidas noutra execução, ficando com o menor valor de cada métrica (e com o
+    maior ruído).
+
+    Args:
+        resultados (dict): alterado destrutivamente
+        novos (dict)
+
+    Returns:
+        dict: resultados
+    """
+    for chave, medicao in novos['resultados'].items():
+        if chave in resultados['resultados']:
+            anterior = resultados['resultados'][chave]
+            resultados['resultados'][chave] = {
+                metrica: (max if metrica == 'ruido' else min)(valor, anterior[metrica])
+                for metrica, valor in medicao.items()}
+
+    return resultados
+
+
+def main(argumentos: list = None) -> int:
+    """Ponto de entrada da linha de comandos.
+
+    Args:
+        argumentos (list): argumentos da linha de comandos (por omissão, sys.argv)
+
+    Returns:
+        int: código de saída (1 se houver regressões face à referência)
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks do prado')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS)
+    parser.add_argument('--geracoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--amostras', type=int, default=AMOSTRAS)
+    parser.add_argument('--saida', help='ficheiro JSON onde guardar os resultados')
+    parser.add_argument('--comparar', help='ficheiro JSON de referência')
+    parser.add_argument('--tolerancia', type=float, default=0.2)
+    parser.add_argument('--confirmacoes', type=int, default=2,
+                        help='execuções extra dos tamanhos com regressões, antes de as dar como confirmadas')
+    args = parser.parse_args(argumentos)
+
+    resultados = executar(tuple(args.tamanhos), args.geracoes, args.semente, args.amostras)
+
+    if args.saida:
+        with open(args.saida, 'w') as fp:
+            json.dump(resultados, fp, indent=2, sort_keys=True)
+
+    if args.comparar:
+        with open(args.comparar, 'r') as fp:
+            referencia = json.load(fp)
+        regressoes = comparar(resultados, referencia, args.tolerancia)
+
+        # uma regressão só é confirmada se os tamanhos em que ocorreu continuarem lentos em novas execuções
+        for _ in range(args.confirmacoes):
+            if not regressoes:
+                break
+            tamanhos = sorted({int(chave.split('/')[1].split('x')[0]) for chave, _, _, _ in regressoes})
+            juntar_resultados(resultados, executar(tuple(tamanhos), args.geracoes, args.semente, args.amostras))
+            regressoes = comparar(resultados, referencia, args.tolerancia)
+
+        for chave, metrica, valor_referencia, valor in regressoes:
+            print(f'REGRESSAO {chave} {metrica}: {valor_referencia:.6g} -> {valor:.6g}')
+
+        return 1 if regressoes else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Gerador determinístico de ficheiros de prados (no formato lido por simula_ecossistema) para testes de carga.
+
+O ficheiro é escrito em streaming, linha a linha do prado, em duas passagens com as mesmas sementes: a primeira
+escreve a linha dos rochedos e a segunda os animais. A memória usada é proporcional à largura do prado (a linha
+anterior de rochedos), independentemente do número de células, rochedos ou animais.
+
+Uso:
+    python gerador_cenarios.py prado.txt --largura 2000 --altura 2000 --densidade 0.1 --predadores 0.2 \\
+        --rochedos 0.02 --agrupamento 0.8 --semente 42
+"""
+import argparse
+import random
+import sys
+
+
+ESPECIES_PRESA = (('rabbit', 5, 0), ('sheep', 7, 0), ('mouse', 3, 0))
+ESPECIES_PREDADOR = (('fox', 10, 8), ('lynx', 20, 15), ('wolf', 15, 10))
+
+
+def gerar_rochedos_linha(gerador: random.Random, largura: int, linha_anterior: bytearray, densidade_rochedos: float,
+                         agrupamento: float) -> bytearray:
+    """Gera os rochedos de uma linha do prado. A probabilidade de uma célula ter um rochedo aumenta com o número de
+    rochedos vizinhos (à esquerda e acima), de forma a formar aglomerados sem alterar a densidade média.
+
+    Args:
+        gerador (random.Random)
+        largura (int)
+        linha_anterior (bytearray): rochedos da linha anterior (1 por célula com rochedo)
+        densidade_rochedos (float): fração média das células com rochedos
+        agrupamento (float): 0 para rochedos independentes, perto de 1 para aglomerados grandes
+
+    Returns:
+        bytearray: rochedos da linha
+    """
+    linha = bytearray(largura)
+    base = densidade_rochedos * (1 - agrupamento)
+
+    for x in range(1, largura - 1):
+        vizinhos = linha[x - 1] + linha_anterior[x]
+        if gerador.random() < base + agrupamento * vizinhos / 2:
+            linha[x] = 1
+
+    return linha
+
+
+def gerar_linhas(largura: int, altura: int, densidade_rochedos: float, agrupamento: float, semente: int):
+    """Gera, por ordem, os rochedos de cada linha interior do prado (sempre a mesma sequência para a mesma semente).
+
+    Args:
+        largura (int)
+        altura (int)
+        densidade_rochedos (float)
+        agrupamento (float)
+        semente (int)
+
+    Yields:
+        tuple: (y, rochedos da linha)
+    """
+    gerador = random.Random(f'rochedos-{semente}')
+    linha = bytearray(largura)
+
+    for y in range(1, altura - 1):
+        linha = gerar_rochedos_linha(gerador, largura, linha, densidade_rochedos, agrupamento)
+        yield y, linha
+
+
+def gerar_ficheiro_prado(nome_ficheiro: str, largura: int, altura: int, densidade: float = 0.1,
+                         fracao_predadores: float = 0.2, densidade_rochedos: float = 0.01, agrupamento: float = 0.0,
+                         semente: int = 0, especies_presa: tuple = ESPECIES_PRESA,
+                         especies_predador: tuple = ESPECIES_PREDADOR) -> int:
+    """Escreve um prado gerado aleatoriamente (mas de forma determinística pela semente) no ficheiro dado.
+
+    Args:
+        nome_ficheiro (str)
+        largura (int): número de colunas, incluindo as montanhas
+        altura (int): número de linhas, incluindo as montanhas
+        densidade (float): fração das células livres (sem rochedo) ocupadas por animais
+        fracao_predadores (float): fração dos animais que são predadores
+        densidade_rochedos (float): fração média das células interiores com rochedos
+        agrupamento (float): entre 0 (rochedos independentes) e 1 (aglomerados)
+        semente (int)
+        especies_presa (tuple): (especie, reproducao, alimentacao) das presas
+        especies_predador (tuple): (especie, reproducao, alimentacao) dos predadores
+
+    Raises:
+        ValueError: 'gerar_ficheiro_prado: argumentos invalidos'
+
+    Returns:
+        int: número de animais escritos
+    """
+    if largura < 3 or altura < 3 or not 0 <= agrupamento < 1:
+        raise ValueError('gerar_ficheiro_prado: argumentos invalidos')
+
+    nr_animais = 0
+
+    with open(nome_ficheiro, 'w', buffering=1 << 20) as fp:
+        fp.write(f'({largura - 1}, {altura - 1})\n')
+
+        # primeira passagem: linha dos rochedos
+        nr_rochedos = 0
+        fp.write('(')
+        for y, linha in gerar_linhas(largura, altura, densidade_rochedos, agrupamento, semente):
+            rochedos = [f'({x}, {y})' for x in range(1, largura - 1) if linha[x]]
+            if rochedos:
+                fp.write((', ' if nr_rochedos else '') + ', '.join(rochedos))
+                nr_rochedos += len(rochedos)
+        fp.write(',)\n' if nr_rochedos == 1 else ')\n')
+
+        # segunda passagem: os mesmos rochedos (mesma semente) e os animais nas restantes células
+        gerador = random.Random(f'animais-{semente}')
+        for y, linha in gerar_linhas(largura, altura, densidade_rochedos, agrupamento, semente):
+            animais = []
+
+            for x in range(1, largura - 1):
+                if linha[x] or gerador.random() >= densidade:
+                    continue
+
+                especies = especies_predador if gerador.random() < fracao_predadores else especies_presa
+                especie, reproducao, alimentacao = especies[gerador.randrange(len(especies))]
+                animais.append(f'({especie!r}, {reproducao}, {alimentacao}, ({x}, {y}))\n')
+
+            fp.write(''.join(animais))
+            nr_animais += len(animais)
+
+    return nr_animais
+
+
+def main(argumentos: list = None) -> int:
+    """Ponto de entrada da linha de comandos.
+
+    Args:
+        argumentos (list): argumentos da linha de comandos (por omissão, sys.argv)
+
+    Returns:
+        int: código de saída
+    """
+    parser = argparse.ArgumentParser(description='Gerador de ficheiros de prados')
+    parser.add_argument('ficheiro')
+    parser.add_argument('--largura', type=int, required=True)
+    parser.add_argument('--altura', type=int, required=True)
+    parser.add_argument('--densidade', type=float, default=0.1)
+    parser.add_argument('--predadores', type=float, default=0.2)
+    parser.add_argument('--rochedos', type=float, default=0.01)
+    parser.add_argument('--agrupamento', type=float, default=0.0)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args(argumentos)
+
+    nr_animais = gerar_ficheiro_prado(args.ficheiro, args.largura, args.altura, args.densidade, args.predadores,
+                                      args.rochedos, args.agrupamento, args.semente)
+    print(f'{args.ficheiro}: {nr_animais} animais', file=sys.stderr)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
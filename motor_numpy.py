@@ -0,0 +1,557 @@
+"""Motor alternativo da geração do prado em NumPy (estrutura de arrays).
+
+Requer o NumPy (dependência opcional, apenas deste módulo). O estado guarda a espécie, idade, fome e
+célula de cada animal em arrays, mais uma grelha de ocupação com o índice do animal em cada célula.
+
+Numa geração, os animais sem nenhum outro animal anterior (em ordem de leitura) a distância de
+Manhattan <= 2 não dependem de nada do que acontece antes deles na geração, e são resolvidos todos
+de uma vez com operações vetorizadas. Os restantes (movimentos em conflito) são resolvidos
+sequencialmente, em ordem de leitura, tal como em geracao. O resultado é idêntico ao de geracao.
+
+Para muitos prados pequenos com a mesma dimensão (por exemplo, variações aleatórias de um cenário), o ensemble
+(cria_ensemble, geracao_ensemble) guarda todos os membros em arrays (membro, célula) e resolve o mesmo turno de
+todos os membros de uma só vez.
+"""
+import numpy as np
+
+from motor_paralelo import criar_animal_registo, criar_prototipos
+from Projeto2Final import (Animal, construir_prado, cria_posicao, eh_prado_esparso, eliminar_animal, inserir_animal,
+                           obter_animal, obter_especie, obter_eventos, obter_fome, obter_freq_alimentacao,
+                           obter_freq_reproducao, obter_idade, obter_posicao_animais, obter_tamanho_x,
+                           obter_tamanho_y, obter_valor_numerico)
+
+
+# linhas extra (de obstáculo) antes e depois da grelha, para que as vizinhanças nunca saiam dos arrays
+MARGEM = 2
+
+
+def cria_estado(prado: dict) -> dict:
+    """Converte um prado (denso) no estado em arrays usado pelo motor NumPy.
+
+    Args:
+        prado (dict)
+
+    Raises:
+        ValueError: 'cria_estado: argumentos invalidos' (prado esparso: os arrays teriam o tamanho da área)
+
+    Returns:
+        dict: estado
+    """
+    if eh_prado_esparso(prado):
+        raise ValueError('cria_estado: argumentos invalidos')
+
+    largura = obter_tamanho_x(prado)
+    altura = obter_tamanho_y(prado)
+
+    especies = {}
+    celulas, ids_especie, idades, fomes = [], [], [], []
+
+    for posicao in obter_posicao_animais(prado):
+        animal = obter_animal(prado, posicao)
+        chave = (obter_especie(animal), obter_freq_reproducao(animal), obter_freq_alimentacao(animal),
+                 isinstance(animal, Animal))
+
+        celulas.append(obter_valor_numerico(prado, posicao))
+        ids_especie.append(especies.setdefault(chave, len(especies)))
+        idades.append(obter_idade(animal))
+        fomes.append(obter_fome(animal))
+
+    obstaculos = np.ones((altura + 2 * MARGEM) * largura, dtype=bool)
+    obstaculos[MARGEM * largura: (MARGEM + altura) * largura] = np.frombuffer(prado['obstaculos'], dtype=np.uint8) != 0
+
+    estado = {
+        'largura': largura,
+        'especies': tuple(especies),
+        'reproducao': np.array([chave[1] for chave in especies], dtype=np.int64),
+        'alimentacao': np.array([chave[2] for chave in especies], dtype=np.int64),
+        'predador': np.array([chave[2] != 0 for chave in especies], dtype=bool),
+        'obstaculos': obstaculos,
+        'grelha': np.full(obstaculos.shape, -1, dtype=np.int64),
+        'celula': np.array(celulas, dtype=np.int64),
+        'especie': np.array(ids_especie, dtype=np.int64),
+        'idade': np.array(idades, dtype=np.int64),
+        'fome': np.array(fomes, dtype=np.int64),
+        # totais de nascimentos, mortes por predação e mortes por fome (ver obter_eventos)
+        'eventos': list(obter_eventos(prado)),
+    }
+    atualizar_grelha(estado)
+
+    return estado
+
+
+def atualizar_grelha(estado: dict) -> dict:
+    """Reconstrói a grelha de ocupação a partir das células dos animais.
+
+    Args:
+        estado (dict)
+
+    Returns:
+        dict: estado
+    """
+    grelha = estado['grelha']
+    grelha.fill(-1)
+    grelha[estado['celula'] + MARGEM * estado['largura']] = np.arange(len(estado['celula']))
+
+    return estado
+
+
+def escrever_estado_no_prado(estado: dict, prado: dict) -> dict:
+    """Modifica destrutivamente o prado para conter os animais do estado. Devolve o próprio prado.
+
+    Args:
+        estado (dict)
+        prado (dict): prado com a mesma dimensão e rochedos do estado
+
+    Returns:
+        dict: prado
+    """
+    largura = estado['largura']
+
+    prototipos = criar_prototipos(estado['especies'])
+
+    for posicao in obter_posicao_animais(prado):
+        eliminar_animal(prado, posicao)
+
+    for celula, id_especie, idade, fome in zip(estado['celula'].tolist(), estado['especie'].tolist(),
+                                               estado['idade'].tolist(), estado['fome'].tolist()):
+        inserir_animal(prado, criar_animal_registo(prototipos[id_especie], idade, fome),
+                       cria_posicao(celula % largura, celula // largura))
+
+    populacao = prado['populacao']
+    populacao['nascimentos'], populacao['mortes_predacao'], populacao['mortes_fome'] = estado['eventos']
+
+    return prado
+
+
+def obter_numero_predadores_estado(estado: dict) -> int:
+    """Devolve o número de predadores do estado.
+
+    Args:
+        estado (dict)
+
+    Returns:
+        int: numero de predadores
+    """
+    return int(np.count_nonzero(estado['predador'][estado['especie']]))
+
+
+def obter_numero_presas_estado(estado: dict) -> int:
+    """Devolve o número de presas do estado.
+
+    Args:
+        estado (dict)
+
+    Returns:
+        int: numero de presas
+    """
+    return len(estado['especie']) - obter_numero_predadores_estado(estado)
+
+
+def obter_animais_independentes(estado: dict) -> np.ndarray:
+    """Devolve a máscara dos animais sem nenhum animal anterior (ordem de leitura) a distância <= 2.
+
+    Args:
+        estado (dict)
+
+    Returns:
+        np.ndarray: máscara booleana, um elemento por animal
+    """
+    largura = estado['largura']
+    celulas = estado['celula'] + MARGEM * largura
+    ocupado = estado['grelha'] >= 0
+
+    independentes = np.ones(len(celulas), dtype=bool)
+    for deslocamento in (-1, -2, -largura, -2 * largura, -largura - 1, -largura + 1):
+        independentes &= ~ocupado[celulas + deslocamento]
+
+    return independentes
+
+
+def geracao_independentes(estado: dict, indices: np.ndarray, vivo: np.ndarray) -> tuple:
+    """Resolve, de uma só vez, o turno dos animais independentes indicados.
+
+    Args:
+        estado (dict)
+        indices (np.ndarray): índices dos animais (dois a dois a distância >= 3)
+        vivo (np.ndarray): máscara dos animais vivos, alterada destrutivamente
+
+    Returns:
+        tuple: (células, espécies) das crias nascidas
+    """
+    largura = estado['largura']
+    grelha = estado['grelha']
+    especie = estado['especie'][indices]
+    eh_predador = estado['predador'][especie]
+
+    celulas = estado['celula'][indices] + MARGEM * largura
+    # vizinhos pela ordem de obter_posicoes_adjacentes: cima, direita, baixo, esquerda
+    vizinhos = celulas[:, None] + np.array([-largura, 1, largura, -1])
+
+    ocupantes = grelha[vizinhos]
+    ocupado = ocupantes >= 0
+    presas = ocupado & ~estado['predador'][estado['especie'][np.where(ocupado, ocupantes, 0)]]
+    livres = ~estado['obstaculos'][vizinhos] & ~ocupado
+
+    come = eh_predador & presas.any(axis=1)
+    candidatas = np.where(come[:, None], presas, livres)
+    nr_candidatas = candidatas.sum(axis=1)
+    move = nr_candidatas > 0
+
+    escolha = (celulas - MARGEM * largura) % np.maximum(nr_candidatas, 1)
+    coluna = np.argmax(np.cumsum(candidatas, axis=1) > escolha[:, None], axis=1)
+    linhas = np.arange(len(indices))
+    destinos = np.where(move, vizinhos[linhas, coluna], celulas)
+
+    idade = estado['idade']
+    fome = estado['fome']
+    idade[indices] += 1
+    fome[indices] += eh_predador
+
+    vivo[ocupantes[linhas[come], coluna[come]]] = False
+    fome[indices[come]] = 0
+
+    grelha[celulas[move]] = -1
+    grelha[destinos[move]] = indices[move]
+    estado['celula'][indices] = destinos - MARGEM * largura
+
+    fertil = move & (idade[indices] >= estado['reproducao'][especie])
+    idade[indices[fertil]] = 0
+
+    faminto = eh_predador & (fome[indices] >= estado['alimentacao'][especie])
+    vivo[indices[faminto]] = False
+    grelha[destinos[faminto]] = -1
+
+    crias = np.arange(len(estado['celula']), len(estado['celula']) + np.count_nonzero(fertil))
+    grelha[celulas[fertil]] = crias
+
+    eventos = estado['eventos']
+    eventos[0] += len(crias)
+    eventos[1] += int(np.count_nonzero(come))
+    eventos[2] += int(np.count_nonzero(faminto))
+
+    return celulas[fertil] - MARGEM * largura, especie[fertil]
+
+
+def geracao_sequencial(estado: dict, indices: np.ndarray, vivo: np.ndarray, crias: tuple) -> tuple:
+    """Resolve o turno dos animais indicados um a um, em ordem de leitura (as mesmas regras de iterar_animal).
+
+    Args:
+        estado (dict)
+        indices (np.ndarray): índices dos animais, por ordem de leitura
+        vivo (np.ndarray): máscara dos animais vivos
+        crias (tuple): (células, espécies) das crias já nascidas nesta geração
+
+    Returns:
+        tuple: (células, espécies, vivo) de todos os animais, incluindo as novas crias
+    """
+    largura = estado['largura']
+    margem = MARGEM * largura
+
+    grelha = estado['grelha'].tolist()
+    obstaculos = estado['obstaculos'].tolist()
+    predador = estado['predador'].tolist()
+    reproducao = estado['reproducao'].tolist()
+    alimentacao = estado['alimentacao'].tolist()
+
+    celula = estado['celula'].tolist() + crias[0].tolist()
+    especie = estado['especie'].tolist() + crias[1].tolist()
+    idade = estado['idade'].tolist() + [0] * len(crias[0])
+    fome = estado['fome'].tolist() + [0] * len(crias[0])
+    vivo = vivo.tolist() + [True] * len(crias[0])
+    nascimentos = mortes_predacao = mortes_fome = 0
+
+    for i in indices.tolist():
+        if not vivo[i]:
+            continue
+
+        atual = celula[i] + margem
+        eh_predador = predador[especie[i]]
+        vizinhos = (atual - largura, atual + 1, atual + largura, atual - 1)
+
+        candidatas = []
+        if eh_predador:
+            candidatas = [v for v in vizinhos if grelha[v] >= 0 and not predador[especie[grelha[v]]]]
+        comeu = len(candidatas) > 0
+        if not comeu:
+            candidatas = [v for v in vizinhos if not obstaculos[v] and grelha[v] < 0]
+
+        destino = candidatas[celula[i] % len(candidatas)] if candidatas else atual
+
+        idade[i] += 1
+        if eh_predador:
+            fome[i] += 1
+
+        if destino != atual:
+            if comeu:
+                vivo[grelha[destino]] = False
+                fome[i] = 0
+                mortes_predacao += 1
+
+            grelha[atual] = -1
+            grelha[destino] = i
+            celula[i] = destino - margem
+
+            if idade[i] >= reproducao[especie[i]]:
+                idade[i] = 0
+                grelha[atual] = len(celula)
+                celula.append(atual - margem)
+                especie.append(especie[i])
+                idade.append(0)
+                fome.append(0)
+                vivo.append(True)
+                nascimentos += 1
+
+        if eh_predador and fome[i] >= alimentacao[especie[i]]:
+            vivo[i] = False
+            grelha[destino] = -1
+            mortes_fome += 1
+
+    eventos = estado['eventos']
+    eventos[0] += nascimentos
+    eventos[1] += mortes_predacao
+    eventos[2] += mortes_fome
+
+    estado['idade'] = np.array(idade, dtype=np.int64)
+    estado['fome'] = np.array(fome, dtype=np.int64)
+
+    return np.array(celula, dtype=np.int64), np.array(especie, dtype=np.int64), np.array(vivo, dtype=bool)
+
+
+def geracao_vetorizada(estado: dict) -> dict:
+    """Modifica destrutivamente o estado de acordo com uma geração completa (equivalente a geracao).
+
+    Args:
+        estado (dict)
+
+    Returns:
+        dict: estado
+    """
+    nr_animais = len(estado['celula'])
+    vivo = np.ones(nr_animais, dtype=bool)
+
+    independentes = obter_animais_independentes(estado)
+    crias = geracao_independentes(estado, np.flatnonzero(independentes), vivo)
+
+    # a grelha já inclui o efeito dos animais independentes, que nunca estão a distância < 3 de um animal
+    # em conflito posterior a eles; os animais em conflito são resolvidos pela ordem de leitura
+    celula, especie, vivo = geracao_sequencial(estado, np.flatnonzero(~independentes), vivo, crias)
+
+    ordem = np.argsort(celula[vivo], kind='stable')
+    estado['celula'] = celula[vivo][ordem]
+    estado['especie'] = especie[vivo][ordem]
+    estado['idade'] = estado['idade'][vivo][ordem]
+    estado['fome'] = estado['fome'][vivo][ordem]
+
+    return atualizar_grelha(estado)
+
+
+def geracao_numpy(prado: dict, nr_geracoes: int = 1) -> dict:
+    """Modifica destrutivamente o prado avançando nr_geracoes gerações com o motor NumPy, e devolve o próprio prado.
+
+    Args:
+        prado (dict)
+        nr_geracoes (int): número de gerações a simular
+
+    Returns:
+        dict: prado
+    """
+    estado = cria_estado(prado)
+
+    for _ in range(nr_geracoes):
+        geracao_vetorizada(estado)
+
+    return escrever_estado_no_prado(estado, prado)
+
+
+def cria_ensemble(prados: tuple) -> dict:
+    """Empilha vários prados (densos) com a mesma dimensão num ensemble, em que a espécie, idade e fome dos animais
+    de cada membro são arrays 2D (membro, célula). Os rochedos e animais podem variar de membro para membro.
+
+    Args:
+        prados (tuple): prados com a mesma dimensão
+
+    Raises:
+        ValueError: 'cria_ensemble: argumentos invalidos'
+
+    Returns:
+        dict: ensemble
+    """
+    if len(prados) == 0 or any(eh_prado_esparso(prado) for prado in prados):
+        raise ValueError('cria_ensemble: argumentos invalidos')
+
+    largura = obter_tamanho_x(prados[0])
+    altura = obter_tamanho_y(prados[0])
+    if any(obter_tamanho_x(prado) != largura or obter_tamanho_y(prado) != altura for prado in prados):
+        raise ValueError('cria_ensemble: argumentos invalidos')
+
+    nr_membros = len(prados)
+    especies = {}
+    especie = np.full((nr_membros, largura * altura), -1, dtype=np.int64)
+    idade = np.zeros(especie.shape, dtype=np.int64)
+    fome = np.zeros(especie.shape, dtype=np.int64)
+    obstaculos = np.empty(especie.shape, dtype=bool)
+
+    for membro, prado in enumerate(prados):
+        obstaculos[membro] = np.frombuffer(prado['obstaculos'], dtype=np.uint8) != 0
+
+        for posicao in obter_posicao_animais(prado):
+            animal = obter_animal(prado, posicao)
+            chave = (obter_especie(animal), obter_freq_reproducao(animal), obter_freq_alimentacao(animal),
+                     isinstance(animal, Animal))
+            celula = obter_valor_numerico(prado, posicao)
+
+            especie[membro, celula] = especies.setdefault(chave, len(especies))
+            idade[membro, celula] = obter_idade(animal)
+            fome[membro, celula] = obter_fome(animal)
+
+    # tabelas indexadas por espécie + 1, para que as células vazias (-1) caiam na entrada 0
+    predador = np.array([False] + [chave[2] != 0 for chave in especies], dtype=bool)
+    presa = np.array([False] + [chave[2] == 0 for chave in especies], dtype=bool)
+
+    return {
+        'limite': prados[0]['limite'],
+        'rochedos': tuple(prado['rochedos'] for prado in prados),
+        'largura': largura,
+        'especies': tuple(especies),
+        'reproducao': np.array([0] + [chave[1] for chave in especies], dtype=np.int64),
+        'alimentacao': np.array([0] + [chave[2] for chave in especies], dtype=np.int64),
+        'predador': predador,
+        'presa': presa,
+        'obstaculos': obstaculos,
+        'especie': especie,
+        'idade': idade,
+        'fome': fome,
+        'eventos': np.array([obter_eventos(prado) for prado in prados], dtype=np.int64).reshape(nr_membros, 3),
+    }
+
+
+def obter_populacao_ensemble(ensemble: dict) -> tuple:
+    """Devolve o número de predadores e de presas de cada membro do ensemble.
+
+    Args:
+        ensemble (dict)
+
+    Returns:
+        tuple: (predadores, presas), cada um um array com um elemento por membro
+    """
+    ocupantes = ensemble['especie'] + 1
+
+    return (np.count_nonzero(ensemble['predador'][ocupantes], axis=1),
+            np.count_nonzero(ensemble['presa'][ocupantes], axis=1))
+
+
+def geracao_ensemble(ensemble: dict) -> tuple:
+    """Modifica destrutivamente o ensemble de acordo com uma geração completa de cada membro (equivalente a geracao
+    em cada prado), e devolve a população de cada membro no fim da geração.
+
+    Os membros são independentes: o k-ésimo turno (em ordem de leitura) de todos os membros é resolvido de uma só
+    vez com operações vetorizadas, pelo que o número de passos é o maior número de animais de um membro.
+
+    Args:
+        ensemble (dict)
+
+    Returns:
+        tuple: ver obter_populacao_ensemble
+    """
+    largura = ensemble['largura']
+    nr_membros, nr_celulas = ensemble['especie'].shape
+
+    # arrays planos (membro * nr_celulas + célula), para que cada acesso seja um único índice
+    especie = ensemble['especie'].reshape(-1)
+    idade = ensemble['idade'].reshape(-1)
+    fome = ensemble['fome'].reshape(-1)
+    obstaculos = ensemble['obstaculos'].reshape(-1)
+    predador = ensemble['predador']
+    presa = ensemble['presa']
+    reproducao = ensemble['reproducao']
+    alimentacao = ensemble['alimentacao']
+    eventos = ensemble['eventos']
+
+    # células ocupadas no início da geração, por ordem de leitura, de cada membro (completadas com -1)
+    ocupado = ensemble['especie'] >= 0
+    nr_animais = np.count_nonzero(ocupado, axis=1)
+    nr_turnos = int(nr_animais.max())
+    ordem = np.argsort(~ocupado, axis=1, kind='stable')[:, :nr_turnos]
+    ordem += (np.arange(nr_membros) * nr_celulas)[:, None]
+    ordem[np.arange(nr_turnos) >= nr_animais[:, None]] = -1
+
+    comida = np.zeros(len(especie), dtype=bool)
+    # vizinhos pela ordem de obter_posicoes_adjacentes: cima, direita, baixo, esquerda
+    deslocamentos = np.array([-largura, 1, largura, -1])
+
+    for turno in range(nr_turnos):
+        atual = ordem[:, turno]
+        atual = atual[atual >= 0]
+        atual = atual[~comida[atual]]
+
+        especie_atual = especie[atual]
+        eh_predador = predador[especie_atual + 1]
+        vizinhos = atual[:, None] + deslocamentos
+
+        ocupantes = especie[vizinhos] + 1
+        presas = presa[ocupantes]
+        livres = ~obstaculos[vizinhos] & (ocupantes == 0)
+
+        come = eh_predador & presas.any(axis=1)
+        candidatas = np.where(come[:, None], presas, livres)
+        nr_candidatas = candidatas.sum(axis=1)
+        move = nr_candidatas > 0
+
+        escolha = atual % nr_celulas % np.maximum(nr_candidatas, 1)
+        coluna = np.argmax(np.cumsum(candidatas, axis=1) > escolha[:, None], axis=1)
+        destino = np.where(move, vizinhos[np.arange(len(atual)), coluna], atual)
+
+        nova_idade = idade[atual] + 1
+        nova_fome = np.where(come, 0, fome[atual] + eh_predador)
+        comida[destino[come]] = True
+
+        fertil = move & (nova_idade >= reproducao[especie_atual + 1])
+        nova_idade[fertil] = 0
+
+        especie[atual[move]] = -1
+        especie[destino] = especie_atual
+        idade[destino] = nova_idade
+        fome[destino] = nova_fome
+
+        # as crias ficam na posição de onde o progenitor saiu
+        especie[atual[fertil]] = especie_atual[fertil]
+        idade[atual[fertil]] = 0
+        fome[atual[fertil]] = 0
+
+        faminto = eh_predador & (nova_fome >= alimentacao[especie_atual + 1])
+        especie[destino[faminto]] = -1
+
+        membros = atual // nr_celulas
+        eventos[:, 0] += np.bincount(membros[fertil], minlength=nr_membros)
+        eventos[:, 1] += np.bincount(membros[come], minlength=nr_membros)
+        eventos[:, 2] += np.bincount(membros[faminto], minlength=nr_membros)
+
+    return obter_populacao_ensemble(ensemble)
+
+
+def obter_prado_ensemble(ensemble: dict, membro: int) -> dict:
+    """Devolve um novo prado com o estado atual de um membro do ensemble.
+
+    Args:
+        ensemble (dict)
+        membro (int): índice do membro (pela ordem dos prados dados a cria_ensemble)
+
+    Returns:
+        dict: prado
+    """
+    largura = ensemble['largura']
+    prototipos = criar_prototipos(ensemble['especies'])
+    animais, posicoes = [], []
+
+    for celula in np.flatnonzero(ensemble['especie'][membro] >= 0).tolist():
+        animais.append(criar_animal_registo(prototipos[ensemble['especie'][membro, celula]],
+                                            int(ensemble['idade'][membro, celula]),
+                                            int(ensemble['fome'][membro, celula])))
+        posicoes.append(cria_posicao(celula % largura, celula // largura))
+
+    prado = construir_prado(ensemble['limite'], ensemble['rochedos'][membro], tuple(animais), tuple(posicoes))
+    populacao = prado['populacao']
+    eventos = ensemble['eventos'][membro].tolist()
+    populacao['nascimentos'], populacao['mortes_predacao'], populacao['mortes_fome'] = eventos
+
+    return prado
@@ -0,0 +1,547 @@
+"""Motor paralelo da geração do prado: o prado é dividido em faixas horizontais, cada uma simulada num processo.
+
+O turno de um animal só lê e escreve a sua célula e as adjacentes, pelo que dois turnos só interferem se os
+animais estiverem a distância de Manhattan <= 2. Cada faixa percorre as suas linhas em frente de onda: no passo T,
+a linha y trata os animais das colunas [T*C - y, (T+1)*C - y), onde C é o número de colunas por passo. Com este
+atraso de uma coluna por linha, qualquer par de turnos que interfere é feito pela mesma ordem que em geracao
+(ordem de leitura), e o resultado é idêntico ao da geração sequencial.
+
+Cada faixa só executa os passos em que tem animais por iterar. No fim de cada um, envia à faixa seguinte o conteúdo
+das células da fronteira que o passo pode ter alterado (a sua última linha e a primeira da faixa seguinte), as
+presas comidas nessa primeira linha e o seu próximo passo com animais. A faixa seguinte só começa o passo T depois
+de receber as mensagens de todos os passos <= T da anterior. Assim, o custo de uma geração depende do número de
+animais, e não da área do prado. No fim da geração, cada faixa
+devolve à anterior as duas linhas de fronteira, que só ela tem atualizadas. O ganho máximo com P processos é cerca
+de P * largura / (largura + altura), porque a frente de onda demora largura + altura colunas a atravessar o prado.
+
+Cada processo mantém o estado da sua faixa (e das linhas vizinhas) entre gerações, num prado que cobre apenas essas
+linhas (ver criar_faixa), pelo que a memória total não cresce com o número de processos: entre processos só circulam
+as linhas de fronteira, e o prado só é reconstruído no processo principal quando pedido (escrever_motor_no_prado).
+"""
+import heapq
+import math
+import os
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+
+from Projeto2Final import (Animal, construir_prado, cria_animal, cria_animal_compacto, cria_posicao, eh_prado_esparso,
+                           eliminar_animal, inserir_animal, iterar_turnos, obter_animal, obter_especie, obter_eventos,
+                           obter_fome, obter_freq_alimentacao, obter_freq_reproducao, obter_idade, obter_pos_x,
+                           obter_pos_y, obter_tamanho_x, obter_tamanho_y, obter_valores_ocupados)
+
+
+COLUNAS_POR_PASSO = 64
+
+
+def obter_registos(prado: dict, valor_inicial: int, valor_final: int, especies: dict, desvio: int = 0) -> list:
+    """Devolve os registos (valor numérico, id da espécie, idade, fome) dos animais das posições do prado com
+    valor numérico em [valor_inicial, valor_final), em ordem de leitura.
+
+    Args:
+        prado (dict)
+        valor_inicial (int)
+        valor_final (int)
+        especies (dict): (especie, reproducao, alimentacao, compacto) -> id, acrescentado com as espécies novas
+        desvio (int): linha do prado completo que corresponde à linha 0 do prado dado (os valores numéricos, dos
+            argumentos e dos registos, são os do prado completo)
+
+    Returns:
+        list: registos
+    """
+    largura = obter_tamanho_x(prado)
+    deslocamento = largura * desvio
+    registos = []
+
+    for valor in obter_valores_ocupados(prado, valor_inicial - deslocamento, valor_final - deslocamento):
+        animal = obter_animal(prado, cria_posicao(valor % largura, valor // largura))
+        chave = (obter_especie(animal), obter_freq_reproducao(animal), obter_freq_alimentacao(animal),
+                 isinstance(animal, Animal))
+        registos.append((valor + deslocamento, especies.setdefault(chave, len(especies)), obter_idade(animal),
+                         obter_fome(animal)))
+
+    return registos
+
+
+def criar_prototipos(tabela: list) -> list:
+    """Cria um animal (validado, na representação original) de cada espécie da tabela, a partir do qual são criados
+    os animais dos registos sem voltar a validar a espécie.
+
+    Args:
+        tabela (list): (especie, reproducao, alimentacao, compacto) de cada id de espécie
+
+    Returns:
+        list: protótipo de cada id de espécie
+    """
+    return [(cria_animal_compacto if compacto else cria_animal)(especie, reproducao, alimentacao)
+            for especie, reproducao, alimentacao, compacto in tabela]
+
+
+def criar_animal_registo(prototipo: dict, idade: int, fome: int) -> dict:
+    """Cria o animal de um registo, com a espécie e representação do protótipo.
+
+    Args:
+        prototipo (dict): ver criar_prototipos
+        idade (int)
+        fome (int)
+
+    Returns:
+        dict: animal
+    """
+    animal = Animal(prototipo.id_especie) if isinstance(prototipo, Animal) else dict(prototipo)
+    animal['idade'] = idade
+    animal['fome'] = fome
+
+    return animal
+
+
+def substituir_intervalo(prado: dict, valor_inicial: int, valor_final: int, registos: list, prototipos: list,
+                         desvio: int = 0) -> None:
+    """Substitui os animais das posições com valor numérico em [valor_inicial, valor_final) pelos dos registos.
+
+    Args:
+        prado (dict)
+        valor_inicial (int)
+        valor_final (int)
+        registos (list)
+        prototipos (list): ver criar_prototipos
+        desvio (int): ver obter_registos
+    """
+    largura = obter_tamanho_x(prado)
+    deslocamento = largura * desvio
+
+    for valor in obter_valores_ocupados(prado, valor_inicial - deslocamento, valor_final - deslocamento):
+        eliminar_animal(prado, cria_posicao(valor % largura, valor // largura))
+
+    for valor, id_especie, idade, fome in registos:
+        valor -= deslocamento
+        inserir_animal(prado, criar_animal_registo(prototipos[id_especie], idade, fome),
+                       cria_posicao(valor % largura, valor // largura))
+
+
+def obter_intervalos_fronteira(largura: int, fronteira: int, passo: int, colunas_por_passo: int) -> tuple:
+    """Devolve os intervalos de valores numéricos que a faixa acima da linha fronteira pode alterar no passo dado:
+    na sua última linha (fronteira - 1) e na linha fronteira.
+
+    Args:
+        largura (int)
+        fronteira (int): primeira linha da faixa seguinte
+        passo (int)
+        colunas_por_passo (int)
+
+    Returns:
+        tuple: ((inicio, fim), (inicio, fim))
+    """
+    intervalos = []
+
+    for y, inicio, fim in ((fronteira - 1, passo * colunas_por_passo - fronteira,
+                            (passo + 1) * colunas_por_passo - fronteira + 2),
+                           (fronteira, passo * colunas_por_passo - fronteira + 1,
+                            (passo + 1) * colunas_por_passo - fronteira + 1)):
+        inicio = min(max(inicio, 1), largura - 1)
+        fim = min(max(fim, inicio), largura - 1)
+        intervalos.append((y * largura + inicio, y * largura + fim))
+
+    return tuple(intervalos)
+
+
+def obter_desvio_faixa(largura: int, inicio: int) -> int:
+    """Devolve a linha do prado completo que é a linha 0 do prado da faixa que começa na linha inicio: a maior
+    linha até inicio - 2 (a linha 0 do prado da faixa é montanha, e a linha inicio - 1 tem de ficar no interior)
+    em que largura * linha é múltiplo de 12. Assim, o valor numérico de cada posição no prado da faixa tem o mesmo
+    resto que no prado completo na divisão por 1, 2, 3 e 4 (o número de posições possíveis de um movimento), e os
+    movimentos escolhidos são os mesmos.
+
+    Args:
+        largura (int)
+        inicio (int): primeira linha da faixa
+
+    Returns:
+        int: desvio
+    """
+    multiplo = 12 // math.gcd(largura, 12)
+
+    return max(inicio - 2, 0) // multiplo * multiplo
+
+
+def criar_faixa(tarefa: tuple) -> dict:
+    """Cria o estado de uma faixa num processo: um prado que cobre apenas as linhas da faixa e as vizinhas (com as
+    linhas deslocadas de obter_desvio_faixa), só com os animais e rochedos das linhas [inicio - 1, fim + 1].
+
+    Args:
+        tarefa (tuple): (limite, rochedos, tabela de espécies, inicio, fim, registos, colunas por passo, esparso)
+
+    Returns:
+        dict: faixa
+    """
+    limite, rochedos, tabela, inicio, fim, registos, colunas_por_passo, esparso = tarefa
+    largura = obter_pos_x(limite) + 1
+    desvio = obter_desvio_faixa(largura, inicio)
+    prototipos = criar_prototipos(tabela)
+
+    # a última linha do prado da faixa é montanha: a linha fim + 2 ou a montanha do prado completo
+    limite_faixa = cria_posicao(obter_pos_x(limite), min(fim + 2, obter_pos_y(limite)) - desvio)
+    rochedos_faixa = tuple(cria_posicao(obter_pos_x(rochedo), obter_pos_y(rochedo) - desvio) for rochedo in rochedos)
+
+    prado = construir_prado(limite_faixa, rochedos_faixa,
+                            tuple(criar_animal_registo(prototipos[id_especie], idade, fome)
+                                  for _, id_especie, idade, fome in registos),
+                            tuple(cria_posicao(valor % largura, valor // largura - desvio)
+                                  for valor, _, _, _ in registos),
+                            esparso)
+
+    return {'prado': prado, 'inicio': inicio, 'fim': fim, 'desvio': desvio, 'prototipos': prototipos,
+            'especies': {chave: id_especie for id_especie, chave in enumerate(tabela)},
+            'colunas_por_passo': colunas_por_passo}
+
+
+def receber_fronteira(faixa: dict, ligacao_cima, posicoes_comidas: set):
+    """Recebe da faixa anterior e aplica as alterações de um dos seus passos às linhas de fronteira.
+
+    Args:
+        faixa (dict)
+        ligacao_cima: ligação com a faixa anterior
+        posicoes_comidas (set): atualizado com as presas comidas pela faixa anterior
+
+    Returns:
+        int: próximo passo em que a faixa anterior tem animais por iterar (None se já não tiver nenhum)
+    """
+    prado = faixa['prado']
+    desvio = faixa['desvio']
+    largura = obter_tamanho_x(prado)
+    intervalos, registos_fronteira, comidas, proximo_passo = ligacao_cima.recv()
+
+    for (valor_inicial, valor_final), registos_intervalo in zip(intervalos, registos_fronteira):
+        substituir_intervalo(prado, valor_inicial, valor_final, registos_intervalo, faixa['prototipos'], desvio)
+    posicoes_comidas.update(cria_posicao(valor % largura, valor // largura - desvio) for valor in comidas)
+
+    return proximo_passo
+
+
+def simular_geracao_faixa(faixa: dict, ligacao_cima, ligacao_baixo) -> None:
+    """Simula uma geração das linhas [inicio, fim] de uma faixa, em frente de onda, trocando as fronteiras com as
+    faixas vizinhas. No fim, as linhas [inicio - 1, fim + 1] da faixa estão atualizadas.
+
+    Só são executados os passos em que a faixa tem animais por iterar. Cada mensagem para a faixa seguinte indica
+    o próximo desses passos, até ao qual a fronteira não muda: a faixa seguinte só espera por uma mensagem antes de
+    um passo seu que não seja anterior a esse.
+
+    Args:
+        faixa (dict): ver criar_faixa
+        ligacao_cima: ligação com a faixa anterior (ou None)
+        ligacao_baixo: ligação com a faixa seguinte (ou None)
+    """
+    prado = faixa['prado']
+    inicio = faixa['inicio']
+    fim = faixa['fim']
+    desvio = faixa['desvio']
+    colunas_por_passo = faixa['colunas_por_passo']
+    largura = obter_tamanho_x(prado)
+
+    # animais de cada linha da faixa no início da geração (linhas do prado completo, posições no prado da faixa),
+    # e o índice do próximo a iterar
+    linhas = {}
+    for valor in obter_valores_ocupados(prado, largura * (inicio - desvio), largura * (fim + 1 - desvio)):
+        linhas.setdefault(valor // largura + desvio, []).append(cria_posicao(valor % largura, valor // largura))
+    proximos = dict.fromkeys(linhas, 0)
+
+    # (passo, linha) do próximo animal a iterar em cada linha: o animal da coluna x da linha y é iterado no passo
+    # (x + y) // colunas_por_passo
+    pendentes = [((obter_pos_x(posicoes[0]) + y) // colunas_por_passo, y) for y, posicoes in linhas.items()]
+    heapq.heapify(pendentes)
+
+    if ligacao_baixo is not None:
+        ligacao_baixo.send(((), (), [], pendentes[0][0] if pendentes else None))
+
+    posicoes_comidas = set()
+    proximo_passo_cima = None
+    if ligacao_cima is not None:
+        proximo_passo_cima = receber_fronteira(faixa, ligacao_cima, posicoes_comidas)
+
+    while pendentes:
+        passo = pendentes[0][0]
+        while proximo_passo_cima is not None and proximo_passo_cima <= passo:
+            proximo_passo_cima = receber_fronteira(faixa, ligacao_cima, posicoes_comidas)
+
+        comidas_fronteira = []
+        while pendentes and pendentes[0][0] == passo:
+            _, y = heapq.heappop(pendentes)
+            posicoes = linhas[y]
+            coluna_final = (passo + 1) * colunas_por_passo - y
+            primeiro = proximos[y]
+            ultimo = primeiro
+            while ultimo < len(posicoes) and obter_pos_x(posicoes[ultimo]) < coluna_final:
+                ultimo += 1
+
+            comidas = iterar_turnos(prado, posicoes[primeiro:ultimo], posicoes_comidas)
+            proximos[y] = ultimo
+            if ultimo < len(posicoes):
+                heapq.heappush(pendentes, ((obter_pos_x(posicoes[ultimo]) + y) // colunas_por_passo, y))
+            if y == fim:
+                comidas_fronteira += [largura * (obter_pos_y(posicao) + desvio) + obter_pos_x(posicao)
+                                      for posicao in comidas if obter_pos_y(posicao) + desvio == fim + 1]
+
+        if ligacao_baixo is not None:
+            intervalos = obter_intervalos_fronteira(largura, fim + 1, passo, colunas_por_passo)
+            ligacao_baixo.send((intervalos, [obter_registos(prado, valor_inicial, valor_final, faixa['especies'],
+                                                            desvio)
+                                             for valor_inicial, valor_final in intervalos], comidas_fronteira,
+                                pendentes[0][0] if pendentes else None))
+
+    # os passos da faixa anterior posteriores ao último desta faixa também alteram as linhas inicio - 1 e inicio
+    while proximo_passo_cima is not None:
+        proximo_passo_cima = receber_fronteira(faixa, ligacao_cima, posicoes_comidas)
+
+    # as linhas inicio - 1 e inicio só estão completas nesta faixa, e as linhas fim e fim + 1 na seguinte: a troca é
+    # primeiro enviada para cima e depois recebida de baixo, pelo que a última faixa desbloqueia as restantes
+    if ligacao_cima is not None:
+        ligacao_cima.send(obter_registos(prado, largura * (inicio - 1), largura * (inicio + 1), faixa['especies'],
+                                         desvio))
+    if ligacao_baixo is not None:
+        substituir_intervalo(prado, largura * fim, largura * (fim + 2), ligacao_baixo.recv(), faixa['prototipos'],
+                             desvio)
+
+
+def executar_faixa(ligacao_pai, ligacao_cima, ligacao_baixo) -> None:
+    """Ciclo de um processo de faixa: cria a faixa com a primeira tarefa recebida do processo principal e depois
+    executa cada pedido recebido: um número de gerações a simular, 'obter' para obter os registos e eventos da
+    faixa, ou 'terminar'. Um erro é enviado ao processo principal em vez do resultado.
+
+    Args:
+        ligacao_pai: ligação (nos dois sentidos) com o processo principal
+        ligacao_cima: ver simular_geracao_faixa
+        ligacao_baixo: ver simular_geracao_faixa
+    """
+    try:
+        faixa = criar_faixa(ligacao_pai.recv())
+
+        while True:
+            pedido = ligacao_pai.recv()
+            if pedido == 'terminar':
+                return
+
+            if pedido == 'obter':
+                prado = faixa['prado']
+                largura = obter_tamanho_x(prado)
+                ligacao_pai.send((obter_registos(prado, largura * faixa['inicio'], largura * (faixa['fim'] + 1),
+                                                 faixa['especies'], faixa['desvio']), obter_eventos(prado)))
+                continue
+
+            for _ in range(pedido):
+                simular_geracao_faixa(faixa, ligacao_cima, ligacao_baixo)
+            ligacao_pai.send(pedido)
+    except Exception as erro:
+        ligacao_pai.send(erro)
+
+
+def dividir_faixas(prado: dict, nr_faixas: int) -> list:
+    """Divide as linhas interiores do prado em faixas de linhas consecutivas com números de animais semelhantes.
+
+    Args:
+        prado (dict)
+        nr_faixas (int): 1, ou no máximo metade do número de linhas interiores (cada faixa tem pelo menos duas)
+
+    Returns:
+        list: (primeira linha, última linha) de cada faixa
+    """
+    largura = obter_tamanho_x(prado)
+    altura = obter_tamanho_y(prado)
+    ordem = obter_valores_ocupados(prado)
+
+    faixas = []
+    inicio = 1
+    for k in range(1, nr_faixas):
+        # linha dos k/nr_faixas dos animais, deixando pelo menos duas linhas para esta faixa e cada uma das seguintes
+        fim = ordem[min(len(ordem) * k // nr_faixas, len(ordem) - 1)] // largura if ordem else inicio
+        fim = min(max(fim, inicio + 1), altura - 2 - 2 * (nr_faixas - k))
+        faixas.append((inicio, fim))
+        inicio = fim + 1
+    faixas.append((inicio, altura - 2))
+
+    return faixas
+
+
+def receber_resultados(motor: dict) -> list:
+    """Recebe a resposta de cada processo do motor, por ordem das faixas. Se algum processo enviar um erro, é
+    levantado logo, sem esperar pelos restantes (que podem ter ficado bloqueados à espera dele).
+
+    Args:
+        motor (dict)
+
+    Returns:
+        list: resposta de cada faixa
+    """
+    ligacoes = motor['ligacoes']
+    resultados = {}
+
+    while len(resultados) < len(ligacoes):
+        for ligacao in wait([ligacao for ligacao in ligacoes if ligacao not in resultados]):
+            resultado = ligacao.recv()
+            if isinstance(resultado, Exception):
+                raise resultado
+            resultados[ligacao] = resultado
+
+    return [resultados[ligacao] for ligacao in ligacoes]
+
+
+def iniciar_motor_paralelo(prado: dict, nr_processos: int = None, colunas_por_passo: int = COLUNAS_POR_PASSO) -> dict:
+    """Divide o prado em faixas e inicia um processo para cada uma, que mantém o estado da faixa entre gerações.
+    O prado não é alterado (ver escrever_motor_no_prado), e o motor deve ser terminado com terminar_motor_paralelo.
+
+    Args:
+        prado (dict)
+        nr_processos (int): número de faixas/processos (por omissão, um por core), limitado a metade do número de
+            linhas interiores
+        colunas_por_passo (int): largura de cada passo da frente de onda
+
+    Raises:
+        ValueError: 'iniciar_motor_paralelo: argumentos invalidos'
+
+    Returns:
+        dict: motor
+    """
+    if type(colunas_por_passo) != int or colunas_por_passo <= 0 or obter_tamanho_y(prado) < 3:
+        raise ValueError('iniciar_motor_paralelo: argumentos invalidos')
+
+    largura = obter_tamanho_x(prado)
+    nr_processos = max(1, min(nr_processos or os.cpu_count(), (obter_tamanho_y(prado) - 2) // 2))
+
+    rochedos_linha = {}
+    for rochedo in prado['rochedos']:
+        rochedos_linha.setdefault(obter_pos_y(rochedo), []).append(rochedo)
+
+    ligacoes = [Pipe() for _ in range(nr_processos)]
+    fronteiras = [Pipe() for _ in range(nr_processos - 1)]
+    motor = {'limite': prado['limite'], 'rochedos': prado['rochedos'], 'esparso': eh_prado_esparso(prado),
+             'eventos': obter_eventos(prado), 'ligacoes': [ligacao for ligacao, _ in ligacoes],
+             'processos': [Process(target=executar_faixa, daemon=True,
+                                   args=(ligacoes[k][1], fronteiras[k - 1][1] if k > 0 else None,
+                                         fronteiras[k][0] if k < nr_processos - 1 else None))
+                           for k in range(nr_processos)]}
+
+    for processo in motor['processos']:
+        processo.start()
+
+    try:
+        especies = {}
+        tarefas = []
+        for inicio, fim in dividir_faixas(prado, nr_processos):
+            rochedos = tuple(rochedo for y in range(inicio - 1, fim + 2) for rochedo in rochedos_linha.get(y, ()))
+            registos = obter_registos(prado, largura * (inicio - 1), largura * (fim + 2), especies)
+            tarefas.append((rochedos, inicio, fim, registos))
+
+        motor['tabela'] = list(especies)
+        for ligacao, (rochedos, inicio, fim, registos) in zip(motor['ligacoes'], tarefas):
+            ligacao.send((prado['limite'], rochedos, motor['tabela'], inicio, fim, registos, colunas_por_passo,
+                          motor['esparso']))
+    except BaseException:
+        terminar_motor_paralelo(motor)
+        raise
+
+    return motor
+
+
+def avancar_motor_paralelo(motor: dict, nr_geracoes: int = 1) -> dict:
+    """Avança nr_geracoes gerações em todas as faixas do motor, e devolve o próprio motor.
+
+    Args:
+        motor (dict)
+        nr_geracoes (int)
+
+    Returns:
+        dict: motor
+    """
+    for ligacao in motor['ligacoes']:
+        ligacao.send(nr_geracoes)
+    receber_resultados(motor)
+
+    return motor
+
+
+def escrever_motor_no_prado(motor: dict, prado: dict) -> dict:
+    """Modifica destrutivamente o prado para conter o estado atual do motor (animais e contadores), e devolve o
+    próprio prado.
+
+    Args:
+        motor (dict)
+        prado (dict): prado com a mesma dimensão e rochedos do motor
+
+    Returns:
+        dict: prado
+    """
+    for ligacao in motor['ligacoes']:
+        ligacao.send('obter')
+
+    largura = obter_pos_x(motor['limite']) + 1
+    prototipos = criar_prototipos(motor['tabela'])
+    animais, posicoes = [], []
+    eventos = list(motor['eventos'])
+
+    for registos, eventos_faixa in receber_resultados(motor):
+        for valor, id_especie, idade, fome in registos:
+            animais.append(criar_animal_registo(prototipos[id_especie], idade, fome))
+            posicoes.append(cria_posicao(valor % largura, valor // largura))
+        eventos = [total + parcela for total, parcela in zip(eventos, eventos_faixa)]
+
+    novo = construir_prado(motor['limite'], motor['rochedos'], tuple(animais), tuple(posicoes), motor['esparso'])
+    populacao = novo['populacao']
+    populacao['nascimentos'], populacao['mortes_predacao'], populacao['mortes_fome'] = eventos
+
+    # as estruturas antigas podem ser partilhadas com cópias do prado: são substituídas, não alteradas
+    prado.clear()
+    prado.update(novo)
+
+    return prado
+
+
+def terminar_motor_paralelo(motor: dict) -> None:
+    """Termina os processos do motor.
+
+    Args:
+        motor (dict)
+    """
+    for ligacao, processo in zip(motor['ligacoes'], motor['processos']):
+        if processo.is_alive():
+            try:
+                ligacao.send('terminar')
+            except OSError:
+                pass
+
+    for processo, ligacao in zip(motor['processos'], motor['ligacoes']):
+        processo.join(timeout=1)
+        ligacao.close()
+        if processo.is_alive():
+            processo.terminate()
+            processo.join()
+
+
+def geracao_paralela(prado: dict, nr_geracoes: int = 1, nr_processos: int = None,
+                     colunas_por_passo: int = COLUNAS_POR_PASSO) -> dict:
+    """Modifica destrutivamente o prado avançando nr_geracoes gerações, com as faixas simuladas em processos
+    diferentes, e devolve o próprio prado. O resultado é idêntico ao de geracao.
+
+    Args:
+        prado (dict)
+        nr_geracoes (int)
+        nr_processos (int): ver iniciar_motor_paralelo
+        colunas_por_passo (int): ver iniciar_motor_paralelo
+
+    Raises:
+        ValueError: 'geracao_paralela: argumentos invalidos'
+
+    Returns:
+        dict: prado
+    """
+    if type(nr_geracoes) != int or nr_geracoes < 0 or type(colunas_por_passo) != int or colunas_por_passo <= 0:
+        raise ValueError('geracao_paralela: argumentos invalidos')
+
+    if nr_geracoes == 0 or obter_tamanho_y(prado) < 3:
+        return prado
+
+    motor = iniciar_motor_paralelo(prado, nr_processos, colunas_por_passo)
+    try:
+        avancar_motor_paralelo(motor, nr_geracoes)
+        escrever_motor_no_prado(motor, prado)
+    finally:
+        terminar_motor_paralelo(motor)
+
+    return prado
@@ -0,0 +1,39 @@
+"""Prados com mais de 2^24 células (o antigo limite a partir do qual os prados passavam a esparsos por omissão)."""
+import pytest
+
+from Projeto2Final import (animal_para_str, cria_animal_compacto, cria_copia_prado, cria_posicao, cria_prado,
+                           eh_prado_esparso, geracao, obter_animais, obter_fome, obter_idade, obter_posicao_animais)
+
+
+LADO = 4097  # 4097 * 4097 = 2^24 + 2^13 + 1 células
+
+
+def criar_prado_grande() -> dict:
+    posicoes = tuple(cria_posicao(x, y) for x, y in ((1, 1), (2, 1), (4000, 4000), (4001, 4000), (2048, 3)))
+    animais = (cria_animal_compacto('rabbit', 2, 0), cria_animal_compacto('fox', 3, 2),
+               cria_animal_compacto('rabbit', 2, 0), cria_animal_compacto('sheep', 3, 0),
+               cria_animal_compacto('fox', 3, 2))
+
+    return cria_prado(cria_posicao(LADO - 1, LADO - 1), (cria_posicao(3, 1), cria_posicao(2048, 2)), animais, posicoes)
+
+
+def descrever_animais(prado: dict) -> list:
+    return [(animal_para_str(animal), obter_idade(animal), obter_fome(animal)) for animal in obter_animais(prado)]
+
+
+def test_prado_grande_denso_por_omissao():
+    assert not eh_prado_esparso(criar_prado_grande())
+
+
+def test_prado_grande_no_motor_numpy():
+    motor_numpy = pytest.importorskip('motor_numpy')
+
+    prado = criar_prado_grande()
+    referencia = cria_copia_prado(prado)
+    for _ in range(3):
+        geracao(referencia)
+
+    motor_numpy.geracao_numpy(prado, 3)
+
+    assert obter_posicao_animais(prado) == obter_posicao_animais(referencia)
+    assert descrever_animais(prado) == descrever_animais(referencia)